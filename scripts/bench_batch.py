@@ -0,0 +1,80 @@
+"""Throughput of core.batch (programs/sec) by worker count.
+
+Builds a synthetic JSONL batch from the golden corpus inputs (days x level x
+goal maps x selections, with a share of repeated records), runs it through
+run_batch for each worker count and checks that every run writes the same
+output, identical to cached_create_complete_program record by record.
+
+Usage: python scripts/bench_batch.py [--records 2000] [--duplicates 0.3] [--workers 0,1,2,4]
+"""
+import argparse
+import io
+import json
+import random
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from check_golden_programs import sample_goal_maps, sample_selections
+from core.batch import run_batch
+from core.program_cache import cached_create_complete_program
+
+
+def synthetic_batch(records, duplicates, seed=0):
+    rng = random.Random(seed)
+    goal_maps = sample_goal_maps()
+    selections = sample_selections() + [[]]
+    lines = []
+    for i in range(records):
+        if lines and rng.random() < duplicates:
+            lines.append(rng.choice(lines))
+            continue
+        # Random subsets so that most records are distinct
+        selection = [name for name in rng.choice(selections) if rng.random() < 0.6]
+        lines.append(json.dumps({'id': i, 'level': rng.choice(('beginner', 'advanced')),
+                                 'days': rng.randint(2, 6), 'goals': rng.choice(goal_maps),
+                                 'selection': selection}, ensure_ascii=False))
+    return [line + '\n' for line in lines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--duplicates', type=float, default=0.3)
+    default_workers = sorted({0, 1, 2, os.cpu_count() or 1})
+    parser.add_argument('--workers', default=','.join(map(str, default_workers)))
+    parser.add_argument('--chunksize', type=int, default=16)
+    args = parser.parse_args()
+
+    lines = synthetic_batch(args.records, args.duplicates)
+    print(f'{len(lines)} records, cpu_count={os.cpu_count()}')
+
+    reference = None
+    for workers in (int(w) for w in args.workers.split(',')):
+        out = io.StringIO()
+        stats = run_batch(lines, out, workers=workers, chunksize=args.chunksize)
+        output = out.getvalue()
+        if reference is None:
+            reference = output
+        status = 'same output' if output == reference else 'OUTPUT DIFFERS'
+        print(f"workers={workers:2d}: {stats['programs_per_sec']:8.0f} programs/s  "
+              f"({stats['generated']} generated, {stats['duplicates']} duplicates, {stats['seconds']:.2f} s)  {status}")
+
+    # The batch output must match the web path record by record
+    for line, result_line in zip(lines, reference.splitlines()):
+        record = json.loads(line)
+        programme, split_name, sessions_order = cached_create_complete_program(
+            record['days'], record['goals'], record['selection'], record['level'])
+        expected = {'split_name': split_name, 'sessions_order': sessions_order, 'programme': programme}
+        if json.loads(result_line)['result'] != json.loads(json.dumps(expected)):
+            print(f"FAIL: record {record['id']} differs from cached_create_complete_program")
+            return 1
+    print('OK: batch output identical to cached_create_complete_program')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
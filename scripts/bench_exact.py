@@ -0,0 +1,124 @@
+"""Solution quality vs time: greedy engine vs the exact engine.
+
+Runs both engines over the golden corpus inputs and random cases and
+reports, per engine, the summed metrics of core.exact_engine.program_cost:
+
+  deviation       sum over muscles of |weekly sets - target|
+  overshoot       sets above target
+  type_deviation  poly / iso split error
+  lines           (exercise, session) rows
+  over_cap        rows above 4 sets
+  over_appearances exercises in more than 2 sessions
+
+plus the time per program (mean, p95, max). Fails if an exact program
+breaks a rule (cap, appearances, duplicate rows, poly before iso, session
+without an owner muscle) or does worse than greedy on its own cost.
+
+Usage:
+    python scripts/bench_exact.py
+    python scripts/bench_exact.py --random 500 --seed 3
+"""
+import argparse
+import random
+import time
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core.exact_engine import MAX_SERIES, generate_workout_program_exact, program_cost
+from version_site.core.exercise_database import EXERCISE_RECORDS
+from version_site.core.prog import create_prog, generate_workout_program
+
+sys.path.insert(0, os.path.dirname(__file__))
+from check_engines import golden_cases, random_case
+
+METRICS = ('deviation', 'overshoot', 'type_deviation', 'lines', 'over_cap', 'over_appearances')
+
+
+def rule_errors(programme, days, goals):
+    split = create_prog(days)
+    max_appearances = 2 if days >= 3 else days
+    errors = []
+    appearances = {}
+    for session, entries in programme.items():
+        names = [e['exercice'] for e in entries]
+        if len(names) != len(set(names)):
+            errors.append(f'{session}: duplicate rows')
+        kinds = [0 if EXERCISE_RECORDS[n].is_poly else 1 for n in names]
+        if kinds != sorted(kinds):
+            errors.append(f'{session}: iso before poly')
+        for entry in entries:
+            record = EXERCISE_RECORDS[entry['exercice']]
+            appearances[record.name] = appearances.get(record.name, 0) + 1
+            if not 2 <= entry['series'] <= MAX_SERIES:
+                errors.append(f"{session}: {record.name} has {entry['series']} sets")
+            if not any(m in goals and m in split.sessions[session] for m in record.primary_muscles):
+                errors.append(f'{session}: {record.name} works no goal muscle of the session')
+    errors += [f'{name} in {count} sessions' for name, count in appearances.items() if count > max_appearances]
+    return errors
+
+
+def weighted(cost):
+    return cost['deviation'] * 1_000_000 + cost['type_deviation'] * 1_000 + cost['lines']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--random', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [case for case, _ in golden_cases()]
+    cases += [case for case in (random_case(rng) for _ in range(args.random))
+              if all(m not in ('Trapèzes', 'Mollets') for m in case[1])]
+
+    totals = {engine: dict.fromkeys(METRICS, 0) for engine in ('greedy', 'exact')}
+    times = {'greedy': [], 'exact': []}
+    better = worse = failures = 0
+    for days, goals, selection, level in cases:
+        t0 = time.perf_counter()
+        greedy = generate_workout_program(days, dict(goals), list(selection), level)
+        times['greedy'].append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        exact = generate_workout_program_exact(days, dict(goals), list(selection), level)
+        times['exact'].append(time.perf_counter() - t0)
+
+        costs = {'greedy': program_cost(greedy, goals, level), 'exact': program_cost(exact, goals, level)}
+        for engine, cost in costs.items():
+            for metric in METRICS:
+                totals[engine][metric] += cost[metric]
+        if weighted(costs['exact']) < weighted(costs['greedy']):
+            better += 1
+        elif weighted(costs['exact']) > weighted(costs['greedy']) and not costs['greedy']['over_cap'] \
+                and not costs['greedy']['over_appearances']:
+            worse += 1
+            failures += 1
+            print(f'exact worse than greedy: days={days} level={level} goals={goals}')
+        for error in rule_errors(exact, days, goals):
+            failures += 1
+            print(f'rule broken: days={days} level={level}: {error}')
+
+    print(f'{len(cases)} programs')
+    print(f"{'':8}" + ''.join(f'{m:>17}' for m in METRICS) + f"{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for engine in ('greedy', 'exact'):
+        t = times[engine]
+        print(f'{engine:8}' + ''.join(f'{totals[engine][m]:>17}' for m in METRICS)
+              + f'{sum(t) / len(t) * 1e3:>10.2f}{percentile(t, 0.95) * 1e3:>10.2f}{max(t) * 1e3:>10.2f}')
+    print(f'exact strictly better on {better} programs, worse on {worse}')
+
+    if failures:
+        print(f'FAIL: {failures} problems')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Compare per-request lookup cost: full-table scans vs precomputed indexes.
+
+The catalogue is inflated to ~10k exercises by cloning the real entries, then
+we replay the lookups that build_exercise_pools does for a full goal map
+(one get_exercises_by_muscle per muscle + the shoulder lookup) plus one
+pattern / type / category lookup.
+
+Usage: python scripts/bench_exercise_index.py [--size 10000] [--repeat 200]
+"""
+import argparse
+import sys, os
+import timeit
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core.exercise_database import EXERCISE_DATABASE, MUSCLE_INFO, build_exercise_indexes
+
+
+def inflate(database, size):
+    inflated = {}
+    base = list(database.items())
+    i = 0
+    while len(inflated) < size:
+        name, info = base[i % len(base)]
+        clone = f"{name} #{i // len(base)}"
+        inflated[clone] = dict(info, name=clone)
+        i += 1
+    return inflated
+
+
+def scan_request(db):
+    # Previous implementation: one full walk of the table per helper call
+    for muscle in MUSCLE_INFO:
+        [n for n, info in db.items() if muscle in info["all_muscles"]]
+    [n for n, info in db.items() if "Epaules" in info["all_muscles"]]
+    [n for n, info in db.items() if info["pattern"] == "Hip Hinge"]
+    [n for n, info in db.items() if info["type"] == "isolation"]
+    [n for n, info in db.items() if info["category"] == "pull"]
+
+
+def index_request(indexes):
+    by_muscle = indexes["muscle"]
+    for muscle in MUSCLE_INFO:
+        by_muscle.get(muscle, ())
+    by_muscle.get("Epaules", ())
+    indexes["pattern"].get("Hip Hinge", ())
+    indexes["type"].get("isolation", ())
+    indexes["category"].get("pull", ())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    db = inflate(EXERCISE_DATABASE, args.size)
+    build_time = timeit.timeit(lambda: build_exercise_indexes(db), number=1)
+    indexes = build_exercise_indexes(db)
+
+    scan = min(timeit.repeat(lambda: scan_request(db), number=1, repeat=max(5, args.repeat // 20)))
+    indexed = min(timeit.repeat(lambda: index_request(indexes), number=args.repeat, repeat=5)) / args.repeat
+
+    print(f'catalogue size     : {len(db)} exercises')
+    print(f'index build (once) : {build_time * 1e3:.2f} ms')
+    print(f'per request, scan  : {scan * 1e6:.1f} us')
+    print(f'per request, index : {indexed * 1e6:.2f} us')
+    print(f'speedup            : x{scan / indexed:.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Requests/sec on /media: per-request disk resolution vs the startup manifest.
+
+Both handlers run in the same Flask app through the test client:
+  - legacy   : safe_join_root (up to 6 os.path.exists) + send_file from disk
+  - manifest : /media, answered from the in-memory manifest
+Each is measured for plain GETs and for conditional GETs (If-None-Match).
+
+Usage: python scripts/bench_media.py [--seconds 2]
+"""
+import argparse
+import logging
+import sys, os
+import time
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from flask import abort, send_file
+
+from app import app as flask_app
+from core.exercise_database import EXERCISE_DATABASE
+from core.media import safe_join_root
+
+
+@flask_app.route('/legacy_media/<path:path>')
+def legacy_media(path):
+    real = safe_join_root(path)
+    if not real or not os.path.exists(real):
+        abort(404)
+    return send_file(real)
+
+
+def rps(client, urls, seconds, headers_for=None):
+    n = 0
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for url in urls:
+            resp = client.get(url, headers=headers_for(url) if headers_for else None)
+            resp.close()
+            n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=2)
+    args = parser.parse_args()
+    flask_app.logger.setLevel(logging.WARNING)
+
+    client = flask_app.test_client()
+    paths = sorted({info['image_path'] for info in EXERCISE_DATABASE.values()})
+    etags = {}
+    for prefix in ('/legacy_media/', '/media/'):
+        for p in paths:
+            etags[prefix + p] = client.get(prefix + p).headers.get('ETag')
+
+    for label, prefix in (('legacy', '/legacy_media/'), ('manifest', '/media/')):
+        urls = [prefix + p for p in paths]
+        full = rps(client, urls, args.seconds)
+        cond = rps(client, urls, args.seconds, lambda u: {'If-None-Match': etags[u]})
+        print(f'{label:8s}: {full:8.0f} req/s full GET   {cond:8.0f} req/s conditional GET (304)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Bytes shipped for the catalogue thumbnails: originals vs /media derivatives.
+
+Requests every exercise image the way the templates do (?w=320) with the
+Accept header of a few clients, and reports total bytes and the Pillow decode
+time of what was served (a proxy for the image cost of a PDF render).
+
+Derivatives must be built first:
+    cd version_site && python -m core.media_derivatives build
+
+Usage: python scripts/bench_media_bytes.py [--width 320]
+"""
+import argparse
+import logging
+import sys, os
+import time
+from io import BytesIO
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from PIL import Image
+
+from app import app as flask_app, media_derivatives
+from core.exercise_database import EXERCISE_DATABASE
+
+CLIENTS = (
+    ('original', None, ''),
+    ('webp', 'w', 'image/webp,image/*,*/*;q=0.8'),
+    ('avif+webp', 'w', 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8'),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=320)
+    args = parser.parse_args()
+    flask_app.logger.setLevel(logging.WARNING)
+    if not media_derivatives:
+        print('no derivatives loaded: run `python -m core.media_derivatives build` in version_site first')
+        return 1
+
+    client = flask_app.test_client()
+    paths = sorted({info['image_path'] for info in EXERCISE_DATABASE.values()})
+    baseline = None
+    for label, width_param, accept in CLIENTS:
+        total = 0
+        decode = 0.0
+        for p in paths:
+            query = {'w': args.width} if width_param else {}
+            data = client.get('/media/' + p, query_string=query, headers={'Accept': accept}).data
+            total += len(data)
+            t0 = time.perf_counter()
+            Image.open(BytesIO(data)).load()
+            decode += time.perf_counter() - t0
+        baseline = baseline or total
+        print(f'{label:10s}: {len(paths)} images {total:9d} bytes ({100.0 * total / baseline:5.1f}%)  '
+              f'decode {decode * 1000:7.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""PDF latency: loopback HTTP image fetches vs the local media url_fetcher.
+
+Serves the app on a local port (threaded, so the legacy loopback fetches can
+be answered), renders program_pdf.html for a representative program, then
+times WeasyPrint with the default fetcher (one HTTP request per image back
+into the app) against core.pdf.render_pdf (images read from disk).
+
+Usage: python scripts/bench_pdf.py [--repeat 5] [--days 3]
+"""
+import argparse
+import logging
+import statistics
+import sys, os
+import threading
+import time
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from flask import render_template, request
+from weasyprint import HTML
+from werkzeug.serving import make_server
+
+from app import app as flask_app
+from core.exercise_database import get_exercise_info
+from core.pdf import render_pdf
+from core.prog import create_complete_program
+
+selected = ['Bench press', 'Dips', 'Overhead press', 'Incline press', 'Front raise', 'Lateral raises', 'Pushdown', 'Tricep extension', 'Bent over row', 'Machine row', 'Pull up', 'Chin up', 'Hammer curl', 'Curl', 'Barbell squat', 'Bulgarian split squat', 'Stiff leg deadlift', 'Back hyperextension', 'Leg extension', 'Sissy squat', 'Seated leg curl', 'Nordic curl', 'Machine ab crunch', 'Hanging leg raises']
+objectifs = {'Pectoraux': 'normal_growth', 'Epaules': 'normal_growth', 'Dorsaux': 'normal_growth', 'Biceps': 'normal_growth', 'Triceps': 'normal_growth', 'Quadriceps': 'maintenance'}
+
+
+def program_html(days, base_url):
+    programme_by_session, split_name, sessions_order = create_complete_program(days, objectifs, selected)
+    program_days = {}
+    for day in range(1, days + 1):
+        session_name = sessions_order[(day - 1) % len(sessions_order)]
+        program_days[day] = [(e['exercice'], get_exercise_info(e['exercice'])['image_path'], e['series'])
+                             for e in programme_by_session.get(session_name, [])]
+    with flask_app.test_request_context('/download_pdf', base_url=base_url):
+        return render_template('program_pdf.html', program=program_days, split_name=split_name,
+                               media_base=request.host_url)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args()
+
+    flask_app.logger.setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}/'
+
+    html_string = program_html(args.days, base_url)
+    print(f'{html_string.count("<img")} images in the document')
+    legacy = timed(lambda: HTML(string=html_string, base_url=base_url).write_pdf(), args.repeat)
+    local = timed(lambda: render_pdf(html_string, base_url), args.repeat)
+    server.shutdown()
+
+    print(f'loopback HTTP fetcher : median {legacy[0] * 1e3:7.1f} ms  min {legacy[1] * 1e3:7.1f} ms')
+    print(f'local media fetcher   : median {local[0] * 1e3:7.1f} ms  min {local[1] * 1e3:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Micro-benchmarks of the program generator, stage by stage.
+
+Times each stage of core/prog.py in isolation over a fixed corpus (the golden
+corpus of check_golden_programs.py plus the empty selection): every stage is
+fed inputs precomputed by the previous stages, so a slowdown shows up in the
+stage that caused it.
+
+    create_prog, compute_muscle_targets, build_exercise_pools,
+    distribute_muscle_volume_over_sessions, allocate_exercises_to_sessions,
+    enforce_pattern_coverage, generate_workout_program
+
+For each stage the best of --repeat passes over the corpus is kept and
+reported in microseconds per call (cheap stages go over the corpus several
+times per pass, see --min-pass-time). Results are compared with a stored
+baseline (scripts/bench_pipeline_baseline.json); a stage slower than the
+baseline by more than --threshold is a regression and the exit code is 1.
+Baselines are machine specific: record one on the machine that runs the check.
+
+Usage:
+    python scripts/bench_pipeline.py                      # compare with the baseline
+    python scripts/bench_pipeline.py --record             # rewrite the baseline
+    python scripts/bench_pipeline.py --json out.json      # also dump the results
+    python scripts/bench_pipeline.py --stage build_exercise_pools --repeat 10
+"""
+import argparse
+import copy
+import json
+import platform
+import sys, os
+import time
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core import prog
+from check_golden_programs import sample_goal_maps, sample_selections
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'bench_pipeline_baseline.json')
+
+
+def build_corpus():
+    """(days, level, goals, selection) for every combination of the golden corpus, plus no selection"""
+    selections = sample_selections() + [[]]
+    return [(days, level, goals, selection)
+            for days in range(2, 7)
+            for level in ('beginner', 'advanced')
+            for goals in sample_goal_maps()
+            for selection in selections]
+
+
+def prepare_stage_inputs(corpus):
+    """Run the pipeline once and keep the arguments of every stage call"""
+    inputs = {name: [] for name in STAGES}
+    for days, level, goals, selection in corpus:
+        inputs['create_prog'].append((days,))
+        split = prog.create_prog(days)
+        inputs['compute_muscle_targets'].append((goals, level))
+        targets = prog.compute_muscle_targets(goals, level)
+        inputs['build_exercise_pools'].append((selection, goals, level))
+        pools, pattern_to_poly = prog.build_exercise_pools(selection, goals, level)
+        inputs['distribute_muscle_volume_over_sessions'].append((split, days, targets))
+        sessions_names, session_targets = prog.distribute_muscle_volume_over_sessions(split, days, targets)
+        inputs['allocate_exercises_to_sessions'].append((sessions_names, session_targets, pools, level, goals))
+        programme = prog.allocate_exercises_to_sessions(sessions_names, session_targets, pools, level, goals)
+        inputs['enforce_pattern_coverage'].append((programme, split, pattern_to_poly))
+        inputs['generate_workout_program'].append((days, goals, selection, level))
+    return inputs
+
+
+STAGES = {
+    'create_prog': prog.create_prog,
+    'compute_muscle_targets': prog.compute_muscle_targets,
+    'build_exercise_pools': prog.build_exercise_pools,
+    'distribute_muscle_volume_over_sessions': prog.distribute_muscle_volume_over_sessions,
+    'allocate_exercises_to_sessions': prog.allocate_exercises_to_sessions,
+    'enforce_pattern_coverage': prog.enforce_pattern_coverage,
+    'generate_workout_program': prog.generate_workout_program,
+}
+# Stages that modify their arguments get a fresh copy for every pass (copied outside the timer)
+MUTATING = {'enforce_pattern_coverage'}
+
+
+def _run_pass(func, calls, rounds, mutating):
+    batches = [copy.deepcopy(calls) for _ in range(rounds)] if mutating else [calls] * rounds
+    t0 = time.perf_counter()
+    for args_list in batches:
+        for args in args_list:
+            func(*args)
+    return time.perf_counter() - t0
+
+
+def time_stage(name, calls, repeat, min_pass_time):
+    """Best and median time per call; cheap stages loop over the corpus until a pass lasts min_pass_time"""
+    func = STAGES[name]
+    mutating = name in MUTATING
+    rounds = max(1, int(min_pass_time / max(_run_pass(func, calls, 1, mutating), 1e-9)))
+    passes = sorted(_run_pass(func, calls, rounds, mutating) for _ in range(repeat))
+    n = len(calls) * rounds
+    return {
+        'calls': n,
+        'best_us': passes[0] / n * 1e6,
+        'median_us': passes[len(passes) // 2] / n * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-pass-time', type=float, default=0.2, help='seconds per timed pass (cheap stages)')
+    parser.add_argument('--stage', action='append', choices=list(STAGES), help='only these stages')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown (0.25 = +25%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--record', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    inputs = prepare_stage_inputs(corpus)
+    stages = args.stage or list(STAGES)
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'corpus': len(corpus),
+        'repeat': args.repeat,
+        'stages': {name: time_stage(name, inputs[name], args.repeat, args.min_pass_time) for name in stages},
+    }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.record:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f'recorded baseline for {len(stages)} stages to {args.baseline}')
+
+    baseline = {}
+    if not args.record and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('stages', {})
+
+    regressions = []
+    print(f"{'stage':40s} {'best us':>10s} {'median us':>10s} {'baseline':>10s} {'change':>8s}")
+    for name, r in results['stages'].items():
+        line = f"{name:40s} {r['best_us']:10.1f} {r['median_us']:10.1f}"
+        if name in baseline:
+            ref = baseline[name]['best_us']
+            change = r['best_us'] / ref - 1.0
+            flag = ' REGRESSION' if change > args.threshold else ''
+            if flag:
+                regressions.append(name)
+            line += f" {ref:10.1f} {change:+7.1%}{flag}"
+        print(line)
+
+    if regressions:
+        print(f'FAIL: {len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Per-request cost of request logging, old behaviour vs the new modes.
+
+Times the logging hooks themselves, not whole requests: a page view is
+GET /generate plus one /media fetch per exercise image on the page, and for
+each of those paths the hooks run many times inside a request context that
+holds the session of a visitor who went through the whole flow. Log output
+goes to os.devnull, so only formatting / queueing is measured.
+
+Modes:
+  - off          : no logging hook at all, the reference (loop and call cost only)
+  - legacy       : the old before_request hook, every request logged with the
+                   full session snapshot (selection list included), /media too
+  - text         : the current hooks in text format (/media and /static skipped,
+                   selection logged as a count)
+  - json         : JSON line per request written by the QueueListener thread
+  - json@0.1     : json with LOG_SAMPLE_RATE=0.1
+
+For json modes the time to drain the queue (listener.stop) is included.
+Modes are interleaved over --repeats rounds and the median is reported.
+
+Usage: python scripts/bench_request_logging.py [--calls 200] [--repeats 15]
+"""
+import argparse
+import logging
+import re
+import statistics
+import sys, os
+import time
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from flask import request, session
+
+import app as appmod
+from core.structured_logging import setup_structured_logging
+
+flask_app = appmod.app
+MODES = ('off', 'legacy', 'text', 'json', 'json@0.1')
+
+
+def session_client():
+    """Client with a session that went through the whole level / muscles / patterns flow"""
+    client = flask_app.test_client()
+    client.post('/level', data={'level': 'advanced'})
+    for _ in range(15):
+        client.post('/muscles', data={'goal': 'normal_growth'})
+    for _ in range(40):
+        resp = client.post('/patterns', data={'chosen': ['0', '1']})
+        if 'choose_days' in resp.headers.get('Location', ''):
+            break
+    return client
+
+
+def legacy_log_request_info():
+    # before_request hook as it was before /media was skipped: full session snapshot on every request
+    try:
+        sid = request.cookies.get(flask_app.session_cookie_name)
+    except Exception:
+        sid = None
+    flask_app.logger.info('REQ %s %s sessionid=%s muscle_index=%r pattern_index=%r selected_exercises=%r',
+                          request.method, request.path, sid, session.get('muscle_index'),
+                          session.get('pattern_index'), session.get('selected_exercises'))
+
+
+def no_hook(response=None):
+    return response
+
+
+def configure(mode, devnull):
+    """(before hook, after hook, listener) for a mode"""
+    listener = None
+    flask_app.logger.handlers.clear()
+    flask_app.logger.filters.clear()
+    flask_app.logger.setLevel(logging.INFO)
+    if mode == 'off':
+        return no_hook, no_hook, None
+    if mode in ('legacy', 'text'):
+        flask_app.config['LOG_FORMAT'] = 'text'
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+        flask_app.logger.addHandler(handler)
+        if mode == 'legacy':
+            return legacy_log_request_info, no_hook, None
+    else:
+        flask_app.config['LOG_FORMAT'] = 'json'
+        rate = float(mode.split('@')[1]) if '@' in mode else 1.0
+        listener = setup_structured_logging(flask_app.logger, stream=devnull, sample_rate=rate)
+    return appmod.log_request_info, appmod.log_request_done, listener
+
+
+def view_cost(mode, paths, cookie, calls, devnull):
+    """Seconds of logging hooks per page view (sum over its requests)"""
+    before, after, listener = configure(mode, devnull)
+    total = 0.0
+    for path in paths:
+        with flask_app.test_request_context(path, headers={'Cookie': cookie}):
+            response = flask_app.response_class()
+            session.get('level')  # session opened outside the timed loop
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                before()
+                after(response)
+            total += (time.perf_counter() - t0) / calls
+    if listener is not None:
+        # Writing the queued records (off the request thread), spread over the calls
+        t0 = time.perf_counter()
+        listener.stop()
+        total += (time.perf_counter() - t0) / calls
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200, help='hook calls per path and round')
+    parser.add_argument('--repeats', type=int, default=15)
+    args = parser.parse_args()
+
+    client = session_client()
+    html = client.get('/generate?days=4').get_data(as_text=True)
+    media_urls = sorted(set(re.findall(r'src="(/media/[^"]+)"', html.replace('&amp;', '&'))))
+    cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+    cookie = f'{cookie_name}={client.get_cookie(cookie_name).value}'
+    paths = ['/generate?days=4'] + media_urls
+    print(f'page view = /generate + {len(media_urls)} /media requests, '
+          f'median of {args.repeats} rounds x {args.calls} hook calls per request')
+
+    samples = {mode: [] for mode in MODES}
+    with open(os.devnull, 'w') as devnull:
+        for mode in MODES:
+            view_cost(mode, paths, cookie, 10, devnull)  # warm-up
+        for _ in range(args.repeats):
+            for mode in MODES:
+                samples[mode].append(view_cost(mode, paths, cookie, args.calls, devnull))
+    flask_app.logger.handlers.clear()
+
+    ref = statistics.median(samples['off'])
+    for mode in MODES:
+        us = (statistics.median(samples[mode]) - ref) * 1e6
+        spread = (max(samples[mode]) - min(samples[mode])) * 1e6
+        print(f'{mode:9s}: logging overhead {us:8.1f} us/view ({us / len(paths):6.2f} us/request), '
+              f'spread {spread:6.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Batched volume targets vs the per-client loop.
+
+Builds N random clients per number of days and compares
+core.volume_batch.session_targets_many with
+compute_muscle_targets + distribute_muscle_volume_over_sessions, client by
+client (values and muscle order). Then checks create_complete_program_many
+against create_complete_program on the canonical selection, including
+duplicates whose selection is shuffled and the same batch in reverse order
+(a result must not depend on its place in the batch), and times both paths.
+
+Usage:
+    python scripts/bench_volume_batch.py            # 5000 clients per days value
+    python scripts/bench_volume_batch.py --clients 20000
+"""
+import argparse
+import random
+import time
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core import volume_batch
+from version_site.core.program_cache import canonical_selection
+from version_site.core.exercise_database import EXERCISE_DATABASE, MUSCLE_INFO
+from version_site.core.prog import (
+    compute_muscle_targets, create_complete_program, create_complete_program_many, create_prog,
+    distribute_muscle_volume_over_sessions,
+)
+
+GOALS = ('maintenance', 'normal_growth', 'prioritised_growth')
+MUSCLES = list(MUSCLE_INFO.keys())
+ALL_EXERCISES = list(EXERCISE_DATABASE.keys())
+
+
+def random_client(rng):
+    goals = {m: rng.choice(GOALS) for m in rng.sample(MUSCLES, rng.randint(0, len(MUSCLES)))}
+    return goals, rng.choice(('beginner', 'advanced'))
+
+
+def reference_plans(days, clients):
+    split = create_prog(days)
+    return [distribute_muscle_volume_over_sessions(split, days, compute_muscle_targets(goals, level))[1]
+            for goals, level in clients]
+
+
+def same_plan(a, b):
+    return a == b and all(list(a[s]) == list(b[s]) for s in a)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--programs', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    failures = 0
+    for days in range(2, 7):
+        clients = [random_client(rng) for _ in range(args.clients)]
+        goal_maps = [goals for goals, _ in clients]
+        levels = [level for _, level in clients]
+
+        t0 = time.perf_counter()
+        expected = reference_plans(days, clients)
+        t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        plans = volume_batch.session_targets_many(days, goal_maps, levels)
+        t_batch = time.perf_counter() - t0
+
+        bad = sum(not same_plan(a, b) for a, b in zip(plans, expected))
+        failures += bad
+        print(f'{days} days: loop {t_loop * 1e3:7.1f} ms, batch {t_batch * 1e3:7.1f} ms '
+              f'for {args.clients} clients, {bad} mismatches')
+
+    requests = []
+    for _ in range(args.programs):
+        goals, level = random_client(rng)
+        selection = rng.sample(ALL_EXERCISES, rng.randint(0, len(ALL_EXERCISES)))
+        requests.append((rng.randint(2, 6), goals, selection, level))
+    requests += requests[:args.programs // 4]  # duplicates
+    for days, goals, selection, level in requests[:args.programs // 4]:
+        # Same exercises in another order: same canonical key, must get the same program
+        shuffled = list(selection)
+        rng.shuffle(shuffled)
+        requests.append((days, goals, shuffled, level))
+    requests.append((3, {'Pectoraux': 'normal_growth', 'Trapèzes': 'maintenance'}, [], 'advanced'))
+
+    t0 = time.perf_counter()
+    expected = [create_complete_program(days, goals, canonical_selection(selection), level)
+                for days, goals, selection, level in requests]
+    t_single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    results = create_complete_program_many(requests, with_session_targets=True)
+    t_many = time.perf_counter() - t0
+    reversed_results = create_complete_program_many(requests[::-1])[::-1]
+
+    for (days, goals, _, level), result, single, from_reversed in zip(requests, results, expected, reversed_results):
+        plan = reference_plans(days, [(goals, level)])[0]
+        if result[:3] != single or from_reversed != single or not same_plan(result[3], plan):
+            failures += 1
+            print(f'program mismatch: days={days} level={level} goals={goals}')
+    print(f'{len(requests)} programs: one by one {t_single * 1e3:.0f} ms, '
+          f'create_complete_program_many {t_many * 1e3:.0f} ms (with session targets)')
+
+    if failures:
+        print(f'FAIL: {failures} mismatches')
+        return 1
+    print('OK: batched targets and programs identical to the per-client path')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Invalid POST /api/program bodies must get a 400 with a JSON error.
+
+Posts each bad body through the Flask test client and checks the status
+and the {"error": ...} payload. Then feeds the same bodies to the batch CLI
+parser (core.batch.parse_line), which must report an error line instead
+of raising.
+
+Usage: python scripts/check_api_errors.py
+"""
+import json
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from app import app
+from core.batch import parse_line
+
+BAD_BODIES = [
+    [],
+    {'level': 'expert'},
+    {'days': 7},
+    {'days': True},
+    {'days': '3'},
+    {'goals': []},
+    {'goals': {'Mollets': 'normal_growth'}},
+    {'goals': {'Pectoraux': 'huge'}},
+    {'goals': {'Pectoraux': []}},
+    {'goals': {'Pectoraux': {'x': 1}}},
+    {'goals': {'Pectoraux': 2}},
+    {'selection': 'Bench press'},
+    {'selection': [999]},
+    {'selection': [True]},
+    {'selection': [['Bench press']]},
+    {'selection': [{'id': 1}]},
+]
+
+
+def main():
+    failures = 0
+    client = app.test_client()
+    for body in BAD_BODIES:
+        response = client.post('/api/program', json=body)
+        payload = response.get_json(silent=True) or {}
+        if response.status_code != 400 or 'error' not in payload:
+            failures += 1
+            print(f'/api/program {json.dumps(body)}: {response.status_code} {payload}')
+        try:
+            _, inputs, error = parse_line(json.dumps(body))
+        except Exception as exc:
+            failures += 1
+            print(f'parse_line {json.dumps(body)}: raised {exc!r}')
+        else:
+            if inputs is not None or error is None:
+                failures += 1
+                print(f'parse_line {json.dumps(body)}: accepted')
+
+    if failures:
+        print(f'FAIL: {failures} problems')
+        return 1
+    print(f'OK: {len(BAD_BODIES)} invalid bodies rejected with 400 and by the batch parser')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
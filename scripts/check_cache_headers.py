@@ -0,0 +1,89 @@
+"""Publicly cacheable responses must not vary on the session cookie.
+
+A visitor goes through the level / muscles / patterns flow (so the request
+carries a session cookie), then fetches a /p/<code> share link and
+/api/catalog (plain and versioned). Neither may send Vary: Cookie, otherwise
+a shared proxy keeps one copy per visitor; the catalog varies on
+Accept-Encoding only (it is served pre-compressed), also on a 304. Checked for the signed cookie session and a
+server-side one, in text and json log formats. /generate must still vary
+on the cookie (it is built from the session).
+
+Usage: python scripts/check_cache_headers.py
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+for p in (PROJECT_ROOT, SITE_ROOT):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+import logging
+from flask.sessions import SecureCookieSessionInterface
+
+import app as appmod
+from core.session_store import MemorySessionStore, ServerSideSessionInterface
+
+flask_app = appmod.app
+flask_app.logger.setLevel(logging.WARNING)
+
+SESSION_INTERFACES = {
+    'cookie': SecureCookieSessionInterface,
+    'memory': lambda: ServerSideSessionInterface(MemorySessionStore(), skip_prefixes=appmod.UNLOGGED_PREFIXES),
+}
+
+
+def visitor():
+    """Client holding a session cookie, as after the program flow"""
+    client = flask_app.test_client()
+    client.post('/level', data={'level': 'advanced'})
+    for _ in range(10):
+        client.post('/muscles', data={'goal': 'normal_growth'})
+    for _ in range(30):
+        response = client.post('/patterns', data={'chosen': ['0']})
+        if 'choose_days' in response.headers.get('Location', ''):
+            break
+    client.post('/choose_days', data={'days': '3'})
+    return client
+
+
+def main():
+    failures = 0
+    share_url = flask_app.test_client().post('/api/program', json={
+        'days': 3, 'level': 'beginner', 'goals': {'Pectoraux': 'normal_growth'}}).get_json()['share_url']
+    share_path = '/' + share_url.split('://', 1)[-1].split('/', 1)[1]
+    catalog_path = '/api/catalog/' + appmod.catalog.version
+
+    for backend, make_interface in SESSION_INTERFACES.items():
+        flask_app.session_interface = make_interface()
+        for log_format in ('text', 'json'):
+            flask_app.config['LOG_FORMAT'] = log_format
+            client = visitor()
+            if not client.get_cookie(flask_app.config['SESSION_COOKIE_NAME']):
+                failures += 1
+                print(f'{backend}/{log_format}: the flow left no session cookie')
+            for path in (share_path, '/api/catalog', catalog_path):
+                response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+                if response.status_code != 200 or 'cookie' in {v.lower() for v in response.vary}:
+                    failures += 1
+                    print(f'{backend}/{log_format} {path}: {response.status_code} Vary: {response.headers.get("Vary")}')
+            for path in ('/api/catalog', catalog_path):
+                response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+                revalidated = client.get(path, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+                for r in (response, revalidated):
+                    if r.headers.get('Vary') != 'Accept-Encoding':
+                        failures += 1
+                        print(f'{backend}/{log_format} {path} ({r.status_code}): Vary: {r.headers.get("Vary")}')
+            response = client.get('/generate')
+            if 'cookie' not in {v.lower() for v in response.vary}:
+                failures += 1
+                print(f'{backend}/{log_format} /generate: no Vary: Cookie')
+
+    if failures:
+        print(f'FAIL: {failures} problems')
+        return 1
+    print(f'OK: {share_path} and /api/catalog do not vary on the session cookie')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
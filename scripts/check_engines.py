@@ -0,0 +1,102 @@
+"""Cross-check of the generator engines.
+
+Runs the "array" engine (core.array_engine) on every input of the golden
+corpus (scripts/golden_programs.json) and on random cases, and compares its
+output with the reference generate_workout_program. Random cases also cover
+empty selections, unknown exercise names, muscles outside MUSCLE_INFO and
+duplicated selections. Then times both engines on the same inputs.
+
+Usage:
+    python scripts/check_engines.py                 # 2000 random cases
+    python scripts/check_engines.py --random 10000 --seed 7
+"""
+import argparse
+import json
+import random
+import time
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core.array_engine import generate_workout_program_array
+from version_site.core.exercise_database import EXERCISE_DATABASE, MUSCLE_INFO
+from version_site.core.prog import create_complete_program, generate_workout_program
+
+sys.path.insert(0, os.path.dirname(__file__))
+from check_golden_programs import GOLDEN_PATH, sample_selections
+
+GOALS = ('maintenance', 'normal_growth', 'prioritised_growth')
+MUSCLES = list(MUSCLE_INFO.keys())
+ALL_EXERCISES = list(EXERCISE_DATABASE.keys())
+
+
+def golden_cases():
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        golden = json.load(f)
+    selections = sample_selections()
+    return [((r['days'], r['goals'], selections[r['selection']], r['level']), r['programme']) for r in golden]
+
+
+def random_case(rng):
+    days = rng.randint(2, 6)
+    level = rng.choice(('beginner', 'advanced'))
+    muscles = rng.sample(MUSCLES, rng.randint(0, len(MUSCLES)))
+    if rng.random() < 0.05:
+        muscles.append(rng.choice(('Trapèzes', 'Mollets')))  # hors MUSCLE_INFO
+    goals = {m: rng.choice(GOALS) for m in muscles}
+    roll = rng.random()
+    if roll < 0.15:
+        selection = []
+    else:
+        selection = rng.sample(ALL_EXERCISES, rng.randint(1, len(ALL_EXERCISES)))
+        if roll > 0.9:
+            selection += ['Exercice inconnu'] + selection[:3]
+    return days, goals, selection, level
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--random', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    golden = golden_cases()
+    for (days, goals, selection, level), expected in golden:
+        if generate_workout_program_array(days, dict(goals), list(selection), level) != expected:
+            failures += 1
+            print(f'golden mismatch: days={days} level={level} goals={goals}')
+
+    rng = random.Random(args.seed)
+    cases = [random_case(rng) for _ in range(args.random)]
+    for days, goals, selection, level in cases:
+        reference = generate_workout_program(days, dict(goals), list(selection), level)
+        if generate_workout_program_array(days, dict(goals), list(selection), level) != reference:
+            failures += 1
+            print(f'random mismatch: days={days} level={level} goals={goals} selection={selection}')
+
+    programme, _, _ = create_complete_program(4, {'Pectoraux': 'normal_growth'}, ['Bench press'], engine='array')
+    if programme != create_complete_program(4, {'Pectoraux': 'normal_growth'}, ['Bench press'], engine='reference')[0]:
+        failures += 1
+        print('create_complete_program(engine=...) mismatch')
+
+    inputs = [case for case, _ in golden] + cases
+    timings = {}
+    for name, fn in (('reference', generate_workout_program), ('array', generate_workout_program_array)):
+        t0 = time.perf_counter()
+        for days, goals, selection, level in inputs:
+            fn(days, dict(goals), list(selection), level)
+        timings[name] = (time.perf_counter() - t0) / len(inputs) * 1e6
+    print(f"reference {timings['reference']:.0f} µs/programme, array {timings['array']:.0f} µs/programme "
+          f"(x{timings['reference'] / timings['array']:.2f})")
+
+    if failures:
+        print(f'FAIL: {failures} mismatches')
+        return 1
+    print(f'OK: {len(golden)} golden + {len(cases)} random programs identical across engines')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
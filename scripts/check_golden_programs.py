@@ -0,0 +1,89 @@
+"""Golden-output check for the program generator.
+
+Runs generate_workout_program over every days (2-6) x level combination and
+a fixed sample of goal maps / selections, and compares the JSON output
+byte-for-byte with scripts/golden_programs.json.
+
+Selections are always explicit: with an empty selection the pools are built
+from all exercises, and that path is covered through the full catalogue list.
+
+Usage:
+    python scripts/check_golden_programs.py            # compare
+    python scripts/check_golden_programs.py --record   # rewrite the golden file
+"""
+import json
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from version_site.core.prog import generate_workout_program
+from version_site.core.exercise_database import EXERCISE_DATABASE, MUSCLE_INFO
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'golden_programs.json')
+
+GOALS = ('maintenance', 'normal_growth', 'prioritised_growth')
+MUSCLES = list(MUSCLE_INFO.keys())
+ALL_EXERCISES = list(EXERCISE_DATABASE.keys())
+
+
+def sample_goal_maps():
+    maps = [{m: g for m in MUSCLES} for g in GOALS]
+    # Rotating patterns, with some muscles left unset
+    for seed in range(9):
+        maps.append({m: GOALS[(seed + i * (seed % 3 + 1)) % 3]
+                     for i, m in enumerate(MUSCLES) if (seed + i) % 5 != 4})
+    # The reference upper-body map used by the diag scripts
+    maps.append({'Pectoraux': 'normal_growth', 'Epaules': 'normal_growth', 'Dorsaux': 'normal_growth',
+                 'Biceps': 'normal_growth', 'Triceps': 'normal_growth', 'Quadriceps': 'maintenance'})
+    return maps
+
+
+def sample_selections():
+    return [
+        ALL_EXERCISES,
+        ALL_EXERCISES[::2],
+        ALL_EXERCISES[1::3],
+        list(reversed(ALL_EXERCISES)),
+        ['Bench press', 'Incline press', 'Overhead press', 'Dips',
+         'Pushdown', 'Curl', 'Bent over row', 'Barbell squat'],
+    ]
+
+
+def run_corpus():
+    results = []
+    for days in range(2, 7):
+        for level in ('beginner', 'advanced'):
+            for goals in sample_goal_maps():
+                for sel_idx, selection in enumerate(sample_selections()):
+                    programme = generate_workout_program(days, dict(goals), list(selection), level)
+                    results.append({'days': days, 'level': level, 'goals': goals,
+                                    'selection': sel_idx, 'programme': programme})
+    return results
+
+
+def main():
+    results = run_corpus()
+    dumped = json.dumps(results, ensure_ascii=False, separators=(',', ':'))
+    if '--record' in sys.argv:
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            f.write(dumped)
+        print(f'recorded {len(results)} programs to {GOLDEN_PATH}')
+        return 0
+
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        expected = json.load(f)
+    if json.dumps(expected, ensure_ascii=False, separators=(',', ':')) == dumped:
+        print(f'OK: {len(results)} programs identical to golden output')
+        return 0
+
+    mismatches = [i for i, (a, b) in enumerate(zip(expected, results)) if a != b]
+    print(f'FAIL: {len(mismatches)} of {len(results)} programs differ')
+    for i in mismatches[:5]:
+        r = results[i]
+        print(f" - days={r['days']} level={r['level']} selection=#{r['selection']} goals={r['goals']}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Check that /download_pdf works when the app runs on exactly one worker.
+
+Starts `gunicorn --workers 1 --threads 1 app:app` (the Procfile setup), walks
+the selection flow with a cookie jar and downloads the PDF. Before images were
+read from disk, WeasyPrint's loopback requests could never be served by the
+single busy worker and this check timed out.
+
+Usage: python scripts/check_pdf_single_worker.py [--timeout 60]
+"""
+import argparse
+import http.cookiejar
+import socket
+import subprocess
+import sys, os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', '1', '--threads', '1',
+         '--timeout', str(int(args.timeout)), '--bind', f'127.0.0.1:{port}', 'app:app'],
+        cwd=SITE_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+        def post(path, data):
+            return opener.open(base + path, urllib.parse.urlencode(data, doseq=True).encode(), timeout=args.timeout)
+
+        for _ in range(100):
+            try:
+                opener.open(base + '/level', timeout=1)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.1)
+
+        post('/level', {'level': 'advanced'})
+        for _ in range(10):
+            post('/muscles', {'goal': 'normal_growth'})
+        for _ in range(30):
+            resp = post('/patterns', {'chosen': ['0', '1']})
+            if '/choose_days' in resp.geturl():
+                break
+
+        t0 = time.perf_counter()
+        resp = opener.open(base + '/download_pdf?days=3', timeout=args.timeout)
+        body = resp.read()
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.terminate()
+        server.wait()
+
+    if resp.headers.get('Content-Type') != 'application/pdf' or not body.startswith(b'%PDF'):
+        print(f'FAIL: unexpected response {resp.status} {resp.headers.get("Content-Type")}')
+        return 1
+    print(f'OK: {len(body)} byte PDF from a single worker in {elapsed * 1e3:.0f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
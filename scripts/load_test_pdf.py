@@ -0,0 +1,148 @@
+"""Load test: HTML route latency while PDFs are being generated.
+
+Starts gunicorn on a local port, then measures the latency of cheap HTML
+routes (/level, /generate) in two phases:
+  1. idle    : HTML clients only
+  2. loaded  : same HTML clients + PDF clients hammering /download_pdf
+The PDF caches are disabled so every download really renders. Run it once
+with --pdf-workers 0 (render in the request thread, the old behaviour) and
+once with the process pool to compare p99s. 503 responses are the queue
+pushing back and are counted separately.
+
+Usage: python scripts/load_test_pdf.py [--pdf-workers 2] [--threads 8] [--duration 10]
+"""
+import argparse
+import http.cookiejar
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SITE_ROOT = os.path.join(PROJECT_ROOT, 'version_site')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def new_client(base, level='advanced'):
+    """Cookie-carrying opener that has walked the selection flow"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def post(path, data):
+        return opener.open(base + path, urllib.parse.urlencode(data, doseq=True).encode(), timeout=60).read()
+
+    post('/level', {'level': level})
+    for _ in range(10):
+        post('/muscles', {'goal': 'normal_growth'})
+    for _ in range(30):
+        resp = opener.open(base + '/patterns', urllib.parse.urlencode({'chosen': ['0', '1']}, doseq=True).encode(), timeout=60)
+        if '/choose_days' in resp.geturl():
+            break
+    return opener
+
+
+def percentile(samples, p):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def html_worker(opener, base, stop, samples):
+    paths = ['/level', '/generate?days=3']
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        opener.open(base + paths[i % len(paths)], timeout=60).read()
+        samples.append(time.perf_counter() - t0)
+        i += 1
+
+
+def pdf_worker(opener, base, stop, counts):
+    days = 2
+    while not stop.is_set():
+        try:
+            opener.open(base + f'/download_pdf?days={days}', timeout=120).read()
+            counts['200'] += 1
+        except urllib.error.HTTPError as exc:
+            counts[str(exc.code)] = counts.get(str(exc.code), 0) + 1
+            time.sleep(float(exc.headers.get('Retry-After', 1)) / 10)
+        days = 2 + (days - 1) % 5
+
+
+def run_phase(base, html_clients, pdf_clients, duration):
+    stop = threading.Event()
+    samples = []
+    counts = {'200': 0}
+    threads = [threading.Thread(target=html_worker, args=(c, base, stop, samples)) for c in html_clients]
+    threads += [threading.Thread(target=pdf_worker, args=(c, base, stop, counts)) for c in pdf_clients]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    return samples, counts
+
+
+def report(label, samples, counts=None):
+    line = (f'{label:7s}: {len(samples):5d} HTML req  p50 {statistics.median(samples) * 1e3:7.1f} ms  '
+            f'p99 {percentile(samples, 99) * 1e3:7.1f} ms')
+    if counts:
+        line += '  PDF ' + ' '.join(f'{code}={n}' for code, n in sorted(counts.items()))
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf-workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--html-clients', type=int, default=4)
+    parser.add_argument('--pdf-clients', type=int, default=6)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, PDF_WORKERS=str(args.pdf_workers), PDF_QUEUE_SIZE=str(args.queue_size),
+               PDF_CACHE_DIR='', PDF_CACHE_MEMORY_ITEMS='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+         '--bind', f'127.0.0.1:{port}', '--timeout', '120', 'app:app'],
+        cwd=SITE_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + '/level', timeout=1).read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.1)
+        html_clients = [new_client(base) for _ in range(args.html_clients)]
+        pdf_clients = [new_client(base) for _ in range(args.pdf_clients)]
+        # Warm-up: first PDF starts the render pool
+        pdf_clients[0].open(base + '/download_pdf?days=3', timeout=120).read()
+
+        print(f'gunicorn {args.workers}x{args.threads} threads, PDF_WORKERS={args.pdf_workers}, '
+              f'queue={args.queue_size}, {args.duration:.0f}s per phase')
+        idle, _ = run_phase(base, html_clients, [], args.duration)
+        report('idle', idle)
+        loaded, counts = run_phase(base, html_clients, pdf_clients, args.duration)
+        report('loaded', loaded, counts)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,80 +1,190 @@
+import hashlib
 import os
 import sys
-from flask import Flask, render_template, request, send_file, abort, url_for, redirect, session, jsonify, make_response
-from weasyprint import HTML
-from io import BytesIO
+import time
+from flask import (Flask, render_template, request, send_file, abort, url_for, redirect, session, jsonify,
+                   make_response, g, before_render_template, template_rendered)
 
 # make project root importable (assume exercise_database.py is at project root)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, PROJECT_ROOT)
 
-from core.exercise_database import get_pattern_list_for_interface, get_exercise_info, get_muscle_list_with_images
-from core.prog import create_complete_program
+from core.api import ApiError, CatalogBlob, build_catalog, parse_program_request, program_payload
+from core.encoding import EncodingError, decode_program_code, encode_program_code
+from core.exercise_database import get_pattern_list_for_interface, get_muscle_list_with_images
+from core.media import build_media_manifest
+from core.media_derivatives import accepted_image_types, load_derivatives, select_derivative
+from core.pdf import PdfQueueFull, PdfRenderTimeout, pdf_service
+from core.pdf_cache import pdf_cache, pdf_cache_key
+from core.pdf_jobs import pdf_jobs
+from core.program_view import cached_program_view
+from core.program_cache import ProgramCache, cached_create_complete_program, program_cache
+from core.session_store import MemorySessionStore, ServerSideSessionInterface, SqliteSessionStore
+from core.structured_logging import SamplingFilter, setup_structured_logging
+from core.timing import timings
 
 app = Flask(__name__, template_folder="templates")
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key-please-change")
 import logging
 app.logger.setLevel(logging.INFO)
+# LOG_FORMAT=json: one JSON line per event, written by a background thread (see core.structured_logging)
+app.config['LOG_FORMAT'] = os.environ.get('LOG_FORMAT', 'text')
+# Fraction of INFO lines kept (warnings and errors are always kept)
+app.config['LOG_SAMPLE_RATE'] = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+if app.config['LOG_FORMAT'] == 'json':
+    setup_structured_logging(app.logger, sample_rate=app.config['LOG_SAMPLE_RATE'])
+elif app.config['LOG_SAMPLE_RATE'] < 1.0:
+    app.logger.addFilter(SamplingFilter(app.config['LOG_SAMPLE_RATE']))
+
+# Image and static fetches are not logged: a program page triggers dozens of them
+UNLOGGED_PREFIXES = ('/media/', '/static/')
+
+# Session state: signed cookie by default (Flask), or opt-in server-side storage where the cookie only
+# holds an id (compact encoding, see core.session_store).
+# SESSION_BACKEND=cookie, sqlite (shared file, SESSION_SQLITE_PATH) or memory (one process only: sessions
+# are lost on restart and invisible to other gunicorn workers / instances)
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie')
+# Shared /p/ pages and the /api/ are answered without touching the session, whatever the backend: reading it
+# adds Vary: Cookie and a shared proxy would keep one copy per visitor. The routes never read it and the
+# logging hooks below skip it there; both backends only add Vary: Cookie when the session was read.
+SESSIONLESS_PREFIXES = UNLOGGED_PREFIXES + ('/p/', '/api/')
+# Server-side backends don't even load the store for images and static files
+if SESSION_BACKEND == 'memory':
+    app.session_interface = ServerSideSessionInterface(
+        MemorySessionStore(maxsize=int(os.environ.get('SESSION_MEMORY_MAX', 10000))),
+        skip_prefixes=UNLOGGED_PREFIXES)
+elif SESSION_BACKEND == 'sqlite':
+    session_db = os.environ.get('SESSION_SQLITE_PATH', os.path.join(app.instance_path, 'sessions.sqlite'))
+    os.makedirs(os.path.dirname(session_db), exist_ok=True)
+    app.session_interface = ServerSideSessionInterface(SqliteSessionStore(session_db), skip_prefixes=UNLOGGED_PREFIXES)
 
 
 @app.before_request
 def log_request_info():
+    if request.path.startswith(UNLOGGED_PREFIXES):
+        return
+    if app.config['LOG_FORMAT'] == 'json':
+        # Logged once the response is known, with status and duration
+        g.request_log_start = time.perf_counter()
+        return
+    if request.path.startswith(SESSIONLESS_PREFIXES):
+        app.logger.info('REQ %s %s', request.method, request.path)
+        return
     # Log every incoming request with a brief snapshot of important session keys
     try:
         sid = request.cookies.get(app.session_cookie_name)
     except Exception:
         sid = None
-    app.logger.info('REQ %s %s sessionid=%s muscle_index=%r pattern_index=%r selected_exercises=%r',
-                    request.method, request.path, sid, session.get('muscle_index'), session.get('pattern_index'), session.get('selected_exercises'))
+    # The selection is logged as a count (like selected_count in json mode), not the full list
+    app.logger.info('REQ %s %s sessionid=%s muscle_index=%r pattern_index=%r selected_count=%d',
+                    request.method, request.path, sid, session.get('muscle_index'), session.get('pattern_index'),
+                    len(session.get('selected_exercises') or ()))
+
+
+@app.after_request
+def log_request_done(response):
+    start = g.pop('request_log_start', None)
+    if start is not None:
+        extra = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+        if not request.path.startswith(SESSIONLESS_PREFIXES):
+            extra.update({
+                'level_choice': session.get('level'),
+                'muscle_index': session.get('muscle_index'),
+                'pattern_index': session.get('pattern_index'),
+                'selected_count': len(session.get('selected_exercises') or ()),
+            })
+        app.logger.info('request', extra=extra)
+    return response
+
+
+@app.before_request
+def start_timings():
+    timings.start_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    # Stages measured during this request (generate, map, render, pdf_wait...) as a Server-Timing header
+    entries = timings.finish_request()
+    if entries:
+        response.headers['Server-Timing'] = timings.server_timing_header(entries)
+    return response
+
+
+@before_render_template.connect_via(app)
+def _template_render_started(sender, template, context, **extra):
+    if timings.enabled:
+        g.template_render_start = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def _template_render_finished(sender, template, context, **extra):
+    start = g.pop('template_render_start', None)
+    if start is not None:
+        timings.observe('render', time.perf_counter() - start)
+
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage latency histograms of this worker, in Prometheus text format."""
+    return app.response_class(timings.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+
+# Every known image, resolved and loaded once at startup (see core.media)
+MEDIA_MAX_AGE = int(os.environ.get('MEDIA_MAX_AGE', 7 * 24 * 3600))
+media_manifest = build_media_manifest(
+    max_age=MEDIA_MAX_AGE,
+    memory_budget=int(os.environ.get('MEDIA_MEMORY_BUDGET', 64 * 1024 * 1024)),
+)
+# Resized WebP/AVIF versions from `python -m core.media_derivatives build` (empty if never built)
+media_derivatives = load_derivatives(media_manifest, max_age=MEDIA_MAX_AGE)
+if not media_derivatives:
+    app.logger.warning('Media: no derivatives loaded, /media?w= serves originals '
+                       '(run `python -m core.media_derivatives build`)')
 
-def safe_join_root(rel_path):
-    # Resolve path and ensure it's inside project root
-    if os.path.isabs(rel_path):
-        candidate = os.path.normpath(rel_path)
-    else:
-        candidate = os.path.normpath(os.path.join(PROJECT_ROOT, rel_path))
-    
-    # Define all possible image directories
-    tk_images_root = os.path.normpath(os.path.join(PROJECT_ROOT, "version_tkinter", "images"))
-    site_exercices2_root = os.path.normpath(os.path.join(PROJECT_ROOT, "version_site", "exercices2"))
-    
-    if candidate.startswith(PROJECT_ROOT) and os.path.exists(candidate):
-        return candidate
-    
-    # If candidate wasn't found at project root, try relative to version_tkinter/images
-    alt = os.path.normpath(os.path.join(PROJECT_ROOT, rel_path))
-    if os.path.exists(alt):
-        return alt
-    
-    # Try direct path under version_tkinter/images
-    alt2 = os.path.normpath(os.path.join(PROJECT_ROOT, "version_tkinter", rel_path))
-    if os.path.exists(alt2):
-        return alt2
-    
-    # Try joining rel_path to version_tkinter/images (when rel_path starts with images/...)
-    alt3 = os.path.normpath(os.path.join(tk_images_root, os.path.relpath(rel_path, "images"))) if rel_path.startswith("images") else None
-    if alt3 and os.path.exists(alt3):
-        return alt3
-    
-    # Try in version_site/exercices2 folder (for new exercises)
-    if rel_path.startswith("exercices2/"):
-        alt4 = os.path.normpath(os.path.join(site_exercices2_root, os.path.relpath(rel_path, "exercices2")))
-        if os.path.exists(alt4):
-            return alt4
-    
-    # Try direct path in version_site/exercices2
-    alt5 = os.path.normpath(os.path.join(site_exercices2_root, os.path.basename(rel_path)))
-    if os.path.exists(alt5):
-        return alt5
-    
-    return None
 
 @app.route("/media/<path:path>")
 def media(path):
-    real = safe_join_root(path)
-    if not real or not os.path.exists(real):
+    # Only files resolved into the manifest at startup are served
+    entry = media_manifest.get(path)
+    if entry is None:
         abort(404)
-    return send_file(real)
+
+    # ?w=<pixels> and Accept pick the lightest derivative; the original is the fallback
+    derivatives = media_derivatives.get(path)
+    if derivatives is not None:
+        derivative = select_derivative(derivatives, request.args.get('w', type=int),
+                                       accepted_image_types(request.headers.get('Accept', '')))
+        if derivative is not None:
+            entry = derivative.entry
+
+    # Conditional GET answered from the manifest, without touching the filesystem
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(entry.etag)
+    else:
+        not_modified = request.if_modified_since is not None and request.if_modified_since >= entry.last_modified
+    if not_modified:
+        response = app.response_class(status=304)
+        response.headers.extend(h for h in entry.headers if h[0] not in ('Content-Type', 'Content-Length'))
+        if derivatives is not None:
+            response.headers['Vary'] = 'Accept'
+        return response
+
+    if entry.data is None:
+        response = send_file(entry.path, mimetype=entry.mimetype, etag=entry.etag,
+                             last_modified=entry.last_modified, max_age=MEDIA_MAX_AGE)
+    else:
+        response = app.response_class(entry.data)
+        response.headers.clear()
+        response.headers.extend(entry.headers)
+    if derivatives is not None:
+        response.headers['Vary'] = 'Accept'
+    return response
 
 
 @app.route('/', methods=['GET'])
@@ -251,34 +361,17 @@ def generate():
     # DEBUG: Log what's being sent to the generator
     app.logger.info('GENERATE: days=%s, level=%s, objectifs=%s, selected=%s', days, level, objectifs, selected)
 
-    # create_complete_program returns a tuple (programme_by_session, split_name, sessions_order)
-    programme_by_session, split_name, sessions_order = create_complete_program(days, objectifs, selected, level)
+    view = cached_program_view(days, objectifs, selected, level)
     # optional client-side dedupe flag: only enable dedupe script when explicitly requested
     dedupe_flag = bool(request.args.get('dedupe') in ('1', 'true', 'yes'))
-    # Log the raw programme for debugging duplicates seen in UI
-    # no debug logging here in normal UI
-
-    # Map sessions to day numbers (round-robin over sessions_order)
-    program_days = {d+1: [] for d in range(days)}
-    for day in range(1, days+1):
-        session_name = sessions_order[(day-1) % len(sessions_order)] if sessions_order else None
-        if session_name and session_name in programme_by_session:
-            exs = []
-            seen = set()
-            for item in programme_by_session[session_name]:
-                name = item.get('exercice') if isinstance(item, dict) else (item[0] if isinstance(item, tuple) else str(item))
-                series = item.get('series') if isinstance(item, dict) else ''
-                if name in seen:
-                    continue
-                seen.add(name)
-                info = get_exercise_info(name)
-                path = info.get('image_path') if info else None
-                exs.append((name, path, series))
-            program_days[day] = exs
-        else:
-            program_days[day] = []
 
-    return render_template('program.html', program=program_days, dedupe=dedupe_flag)
+    # Stateless link to the same program (no link if the session holds something the code cannot pack)
+    try:
+        share_url = url_for('shared_program', code=encode_program_code(days, objectifs, selected, level), _external=True)
+    except EncodingError:
+        share_url = None
+
+    return render_template('program.html', program=view, dedupe=dedupe_flag, share_url=share_url)
 
 
 @app.route('/program_json')
@@ -293,7 +386,7 @@ def program_json():
     objectifs = session.get('muscle_goals', {})
     selected = session.get('selected_exercises', [])
     level = session.get('level', 'advanced')  # Default to advanced if not set
-    programme_by_session, split_name, sessions_order = create_complete_program(days, objectifs, selected, level)
+    programme_by_session, split_name, sessions_order = cached_create_complete_program(days, objectifs, selected, level)
     return jsonify({
         'programme_by_session': programme_by_session,
         'split_name': split_name,
@@ -301,6 +394,138 @@ def program_json():
     })
 
 
+@app.route('/cache_stats')
+def cache_stats():
+    """Hit/miss counters of the in-process caches (per worker)."""
+    return jsonify({'programs': program_cache.stats(), 'pdf': pdf_cache.stats()})
+
+
+# ---------- JSON API: the whole flow in two requests ----------
+
+API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 3600))
+
+
+def media_url(path):
+    return url_for('media', path=path)
+
+
+# Built once: the catalog only depends on the exercise database
+with app.test_request_context():
+    catalog = CatalogBlob(build_catalog(media_url))
+CATALOG_IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def catalog_response(cache_control):
+    encoding = catalog.negotiate(request.accept_encodings)
+    etag = catalog.etags[encoding]
+    headers = [
+        ('Cache-Control', cache_control),
+        ('ETag', f'"{etag}"'),
+        ('Vary', 'Accept-Encoding'),
+        ('X-Catalog-Version', catalog.version),
+    ]
+    if request.if_none_match.contains(etag):
+        return app.response_class(status=304, headers=headers)
+    body = catalog.bodies[encoding]
+    response = app.response_class(body, mimetype='application/json', headers=headers)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+@app.route('/api/catalog')
+def api_catalog():
+    """Levels, days, goals, muscles, pattern groups and exercises (with image URLs) in one payload."""
+    return catalog_response(f'public, max-age={API_CACHE_MAX_AGE}')
+
+
+@app.route('/api/catalog/<version>')
+def api_catalog_version(version):
+    """Same payload under its content hash: never changes, cached for good."""
+    if version != catalog.version:
+        abort(404)
+    return catalog_response(CATALOG_IMMUTABLE)
+
+
+@app.route('/api/program', methods=['POST'])
+def api_program():
+    """{"level", "days", "goals", "selection"} -> program, plus its share code and PDF link."""
+    try:
+        days, objectifs, selected, level = parse_program_request(request.get_json(silent=True))
+    except ApiError as exc:
+        response = jsonify({'error': str(exc)})
+        response.status_code = 400
+        return response
+
+    payload = program_payload(cached_program_view(days, objectifs, selected, level), request.script_root + '/')
+    code = encode_program_code(days, objectifs, selected, level)
+    payload.update({
+        'code': code,
+        'catalog_version': catalog.version,
+        'share_url': url_for('shared_program', code=code, _external=True),
+        'pdf_url': url_for('shared_program_pdf', code=code, _external=True),
+    })
+    return jsonify(payload)
+
+
+def pdf_busy_response():
+    """503 with Retry-After when the PDF render queue is saturated."""
+    response = make_response('Le serveur génère beaucoup de PDF en ce moment, réessayez dans quelques secondes.', 503)
+    response.headers['Retry-After'] = os.environ.get('PDF_RETRY_AFTER', '5')
+    return response
+
+
+def program_pdf_html(days, objectifs, selected, level):
+    """Render program_pdf.html for the given inputs. Returns (html_string, filename)."""
+    view = cached_program_view(days, objectifs, selected, level)
+    html_string = render_template('program_pdf.html', program=view, split_name=view.split_name,
+                                  media_base=request.host_url)
+    return html_string, f'mon_programme_{view.split_name.replace("/", "-")}.pdf'
+
+
+def session_program_pdf_html(days):
+    """Generate the current session's program and render program_pdf.html.
+
+    Returns (html_string, filename).
+    """
+    objectifs = session.get('muscle_goals', {})
+    selected = session.get('selected_exercises', [])
+    level = session.get('level', 'advanced')
+    return program_pdf_html(days, objectifs, selected, level)
+
+
+def pdf_file_response(pdf_bytes, filename, etag, cache_control='private, no-cache'):
+    response = make_response(pdf_bytes)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(etag)
+    return response
+
+
+def pdf_download_response(html_string, filename, cache_control='private, no-cache'):
+    """Serve the PDF of html_string: 304, PDF cache, or a render in the pool."""
+    # Same HTML -> same PDF: the content hash is both the cache key and the ETag
+    etag = pdf_cache_key(html_string)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.headers['Cache-Control'] = cache_control
+        response.set_etag(etag)
+        return response
+
+    pdf_bytes = pdf_cache.get(etag)
+    if pdf_bytes is None:
+        # Generate PDF in the render pool (images are read from disk, not fetched back over HTTP)
+        try:
+            pdf_bytes = pdf_service.render(html_string, request.host_url)
+        except (PdfQueueFull, PdfRenderTimeout) as exc:
+            app.logger.warning('PDF: render rejected (%s)', type(exc).__name__)
+            return pdf_busy_response()
+        pdf_cache.put(etag, pdf_bytes)
+
+    return pdf_file_response(pdf_bytes, filename, etag, cache_control)
+
+
 @app.route('/download_pdf')
 def download_pdf():
     """Generate and download the program as a PDF"""
@@ -309,49 +534,110 @@ def download_pdf():
     except Exception:
         days = 3
 
-    objectifs = session.get('muscle_goals', {})
-    selected = session.get('selected_exercises', [])
-    level = session.get('level', 'advanced')
+    html_string, filename = session_program_pdf_html(days)
+    return pdf_download_response(html_string, filename)
 
-    # Generate program
-    programme_by_session, split_name, sessions_order = create_complete_program(days, objectifs, selected, level)
-    
-    # Map sessions to day numbers
-    program_days = {d+1: [] for d in range(days)}
-    for day in range(1, days+1):
-        session_name = sessions_order[(day-1) % len(sessions_order)] if sessions_order else None
-        if session_name and session_name in programme_by_session:
-            exs = []
-            seen = set()
-            for item in programme_by_session[session_name]:
-                name = item.get('exercice') if isinstance(item, dict) else (item[0] if isinstance(item, tuple) else str(item))
-                series = item.get('series') if isinstance(item, dict) else ''
-                if name in seen:
-                    continue
-                seen.add(name)
-                info = get_exercise_info(name)
-                path = info.get('image_path') if info else None
-                exs.append((name, path, series))
-            program_days[day] = exs
-        else:
-            program_days[day] = []
-    
-    # Render HTML template for PDF
-    html_string = render_template('program_pdf.html', program=program_days, split_name=split_name)
-    
-    # Generate PDF
-    pdf_buffer = BytesIO()
-    HTML(string=html_string, base_url=request.host_url).write_pdf(pdf_buffer)
-    pdf_buffer.seek(0)
-    
-    # Create response
-    response = make_response(pdf_buffer.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=mon_programme_{split_name.replace("/", "-")}.pdf'
-    
+
+# ---------- Shareable program links: /p/<code> ----------
+# The code packs days, level, goals and selection (core.encoding), so the page is a pure
+# function of the URL: public caching + strong ETag, no session read.
+
+SHARE_MAX_AGE = int(os.environ.get('SHARE_MAX_AGE', 24 * 3600))
+# Rendered shared pages, keyed by (host, code): (html, etag)
+shared_pages = ProgramCache(maxsize=int(os.environ.get('SHARE_CACHE_SIZE', 512)), ttl=SHARE_MAX_AGE)
+
+
+def shared_inputs(code):
+    try:
+        return decode_program_code(code)
+    except EncodingError:
+        abort(404)
+
+
+@app.route('/p/<code>')
+def shared_program(code):
+    def render():
+        days, objectifs, selected, level = shared_inputs(code)
+        html = render_template('program.html', program=cached_program_view(days, objectifs, selected, level), dedupe=False,
+                               share_url=url_for('shared_program', code=code, _external=True),
+                               pdf_url=url_for('shared_program_pdf', code=code))
+        return html, hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+    html, etag = shared_pages.get_or_compute((request.host_url, code), render)
+    cache_control = f'public, max-age={SHARE_MAX_AGE}'
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(html)
+    response.headers['Cache-Control'] = cache_control
+    response.set_etag(etag)
+    return response
+
+
+@app.route('/p/<code>/pdf')
+def shared_program_pdf(code):
+    days, objectifs, selected, level = shared_inputs(code)
+    html_string, filename = program_pdf_html(days, objectifs, selected, level)
+    return pdf_download_response(html_string, filename, f'public, max-age={SHARE_MAX_AGE}')
+
+
+def pdf_job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = url_for('pdf_job_status', job_id=job.id)
+    payload['file_url'] = url_for('pdf_job_file', job_id=job.id)
+    return payload
+
+
+@app.route('/pdf_jobs', methods=['POST'])
+def create_pdf_job():
+    """Capture the session's program and start rendering its PDF in the background."""
+    try:
+        days = int(request.values.get('days', 3))
+    except Exception:
+        days = 3
+
+    html_string, filename = session_program_pdf_html(days)
+    try:
+        job = pdf_jobs.create(html_string, request.host_url, filename)
+    except PdfQueueFull:
+        return pdf_busy_response()
+    app.logger.info('PDF JOB: created %s status=%s', job.id, job.status)
+    response = jsonify(pdf_job_payload(job))
+    response.status_code = 202
+    response.headers['Location'] = url_for('pdf_job_status', job_id=job.id)
     return response
 
 
+@app.route('/pdf_jobs/<job_id>')
+def pdf_job_status(job_id):
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(pdf_job_payload(job))
+
+
+@app.route('/pdf_jobs/<job_id>/file')
+def pdf_job_file(job_id):
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status == 'failed':
+        response = jsonify(pdf_job_payload(job))
+        response.status_code = 500
+        return response
+    if job.data is None:
+        # Not ready yet: tell the client when to poll again
+        response = jsonify(pdf_job_payload(job))
+        response.status_code = 202
+        response.headers['Retry-After'] = '1'
+        return response
+    if request.if_none_match.contains(job.etag):
+        response = make_response('', 304)
+        response.set_etag(job.etag)
+        return response
+    return pdf_file_response(job.data, job.filename, job.etag)
+
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5001))
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
@@ -0,0 +1,155 @@
+"""
+Charges utiles de l'API JSON.
+
+  GET  /api/catalog : tout ce qu'il faut pour le parcours (niveaux, jours,
+                      objectifs, muscles, groupes de patterns, exercices,
+                      URLs d'images) en une réponse
+  POST /api/program : {"level", "days", "goals", "selection"} -> programme
+
+Un client peut ainsi faire tout le parcours en deux requêtes au lieu d'un
+aller-retour par muscle et par pattern. Les fonctions reçoivent `image_url`
+(chemin logique -> URL) pour rester indépendantes de Flask.
+
+Le catalogue ne dépend que de la base : il est sérialisé une seule fois au
+démarrage (CatalogBlob), avec ses versions gzip / brotli et une version tirée
+du hash du contenu.
+"""
+
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel : gzip seul
+    brotli = None
+
+from .encoding import GOAL_CODES, SHARE_LEVELS, SHARE_MAX_DAYS, SHARE_MIN_DAYS
+from .exercise_database import (
+    ALL_EXERCISE_NAMES,
+    EXERCISE_DATABASE,
+    EXERCISE_IDS,
+    MUSCLE_INFO,
+    get_pattern_list_for_interface,
+)
+
+
+class ApiError(ValueError):
+    """Requête invalide : le message est renvoyé au client (400)"""
+
+
+def build_catalog(image_url):
+    exercises = []
+    for name in ALL_EXERCISE_NAMES:
+        info = EXERCISE_DATABASE[name]
+        exercises.append({
+            "id": EXERCISE_IDS[name],
+            "name": name,
+            "type": info["type"],
+            "pattern": info["pattern"],
+            "category": info["category"],
+            "primary_muscles": list(info["primary_muscles"]),
+            "secondary_muscles": list(info.get("secondary_muscles", [])),
+            "equipment": info.get("equipment"),
+            "difficulty": info.get("difficulty"),
+            "image": image_url(info["image_path"]) if info.get("image_path") else None,
+        })
+    return {
+        "levels": list(SHARE_LEVELS),
+        "days": {"min": SHARE_MIN_DAYS, "max": SHARE_MAX_DAYS},
+        "goals": list(GOAL_CODES),
+        "muscles": [
+            {"name": name, "description": info.get("description"),
+             "image": image_url(info["image_path"]) if info.get("image_path") else None}
+            for name, info in MUSCLE_INFO.items()
+        ],
+        # Mêmes groupes et même ordre que l'écran /patterns
+        "patterns": [
+            {"index": idx, "name": pattern_name, "exercises": [EXERCISE_IDS[exo] for exo, _ in group]}
+            for idx, (pattern_name, group) in enumerate(get_pattern_list_for_interface())
+        ],
+        "exercises": exercises,
+    }
+
+
+class CatalogBlob:
+    """
+    Catalogue sérialisé une fois : corps JSON, gzip et brotli précalculés.
+    `version` = début du SHA-256 du JSON ; chaque encodage a son propre ETag fort.
+    """
+
+    __slots__ = ("version", "bodies", "etags")
+
+    def __init__(self, payload):
+        data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.version = hashlib.sha256(data).hexdigest()[:16]
+        self.bodies = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(data, quality=11)
+        self.etags = {
+            encoding: self.version if encoding == "identity" else f"{self.version}-{encoding}"
+            for encoding in self.bodies
+        }
+
+    def negotiate(self, accept_encodings):
+        """Accept-Encoding (werkzeug) -> encodage le plus léger accepté ("identity" par défaut)"""
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and accept_encodings[encoding]:
+                return encoding
+        return "identity"
+
+
+def parse_program_request(payload):
+    """Valide le corps de POST /api/program -> (nb_jours, objectifs, sélection, niveau)"""
+    if not isinstance(payload, dict):
+        raise ApiError("corps JSON attendu")
+
+    level = payload.get("level", "advanced")
+    if level not in SHARE_LEVELS:
+        raise ApiError(f"level doit valoir {' ou '.join(SHARE_LEVELS)}")
+
+    days = payload.get("days", 3)
+    if isinstance(days, bool) or not isinstance(days, int) or not SHARE_MIN_DAYS <= days <= SHARE_MAX_DAYS:
+        raise ApiError(f"days doit être un entier entre {SHARE_MIN_DAYS} et {SHARE_MAX_DAYS}")
+
+    goals = payload.get("goals", {})
+    if not isinstance(goals, dict):
+        raise ApiError("goals doit être un objet {muscle: objectif}")
+    for muscle, goal in goals.items():
+        if muscle not in MUSCLE_INFO:
+            raise ApiError(f"muscle inconnu : {muscle}")
+        if not isinstance(goal, str) or goal not in GOAL_CODES:
+            raise ApiError(f"objectif inconnu pour {muscle} : {goal}")
+
+    # Sélection : noms ou ids du catalogue
+    selection = payload.get("selection", [])
+    if not isinstance(selection, list):
+        raise ApiError("selection doit être une liste de noms ou d'ids d'exercices")
+    names = []
+    for item in selection:
+        if isinstance(item, int) and not isinstance(item, bool) and 0 <= item < len(ALL_EXERCISE_NAMES):
+            names.append(ALL_EXERCISE_NAMES[item])
+        elif isinstance(item, str) and item in EXERCISE_IDS:
+            names.append(item)
+        else:
+            raise ApiError(f"exercice inconnu : {item!r}")
+
+    return days, dict(goals), names, level
+
+
+def program_payload(view, media_root):
+    """ProgramView -> JSON ; media_root préfixe les URLs de vignettes (racine du site)"""
+    return {
+        "split_name": view.split_name,
+        "days": [
+            {
+                "day": day,
+                "exercises": [
+                    {"id": EXERCISE_IDS.get(name), "name": name, "series": series,
+                     "image": media_root + thumb if thumb else None}
+                    for name, thumb, series in exercises
+                ],
+            }
+            for day, exercises in view.items()
+        ],
+    }
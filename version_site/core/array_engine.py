@@ -0,0 +1,238 @@
+"""
+Moteur "array" du générateur : même algorithme que generate_workout_program,
+sur des identifiants entiers denses au lieu de dicts indexés par des chaînes.
+
+  - muscles   : ids de MUSCLE_IDS (+ muscles d'objectifs inconnus de la base, à la suite)
+  - exercices : ids de EXERCISE_IDS ; patterns : ids de PATTERN_IDS
+  - compteurs, cibles, séries poly / iso, rotation, apparitions : array('i')
+  - incidence exercice -> muscles principaux : une ligne de bits par exercice
+  - propriétaire d'un exercice par séance : array('i') ; bénéficiaires, patterns
+    possédés, muscles ayant atteint leur cible : masques de bits
+
+Seule différence de déroulement : dès qu'un tour complet des séances n'ajoute
+plus rien, la boucle s'arrête au lieu de tourner à vide jusqu'à max_iterations.
+
+Le résultat est identique à celui du moteur de référence (vérifié par
+scripts/check_engines.py) ; on le choisit avec
+create_complete_program(..., engine="array") ou PROGRAM_ENGINE=array.
+"""
+
+from array import array
+from typing import Dict, List
+
+from .exercise_database import ALL_EXERCISE_NAMES, EXERCISE_IDS, EXERCISE_RECORD_LIST, MUSCLE_IDS
+from .prog import Level, Objectif, build_exercise_pools, compute_muscle_targets, create_prog
+
+_N_EXERCISES = len(EXERCISE_RECORD_LIST)
+_IS_POLY = tuple(record.is_poly for record in EXERCISE_RECORD_LIST)
+_IS_ISO = tuple(record.type == "isolation" for record in EXERCISE_RECORD_LIST)
+_PATTERN_IDS = tuple(record.pattern_id if record.pattern else -1 for record in EXERCISE_RECORD_LIST)
+_PRIMARY_IDS = tuple(record.primary_muscle_ids for record in EXERCISE_RECORD_LIST)
+_PRIMARY_MASKS = tuple(sum(1 << m for m in set(ids)) for ids in _PRIMARY_IDS)
+_SHOULDER_ARM_IDS = frozenset(MUSCLE_IDS[m] for m in ("Biceps", "Triceps", "Epaules"))
+_POLY, _ISO = 0, 1
+_MAX_ITERATIONS = 1000
+
+
+def _zeros(n):
+    return array("i", [0]) * n
+
+
+def generate_workout_program_array(nb_jours: int,
+                                   objectifs_muscles: Dict[str, Objectif],
+                                   exercices_choisis: List[str],
+                                   level: Level = "advanced"):
+    """Même contrat et même résultat que prog.generate_workout_program"""
+    split = create_prog(nb_jours)
+    sessions_names = list(split.sessions.keys())[:nb_jours]
+    muscle_targets = compute_muscle_targets(objectifs_muscles, level)
+    pools, _ = build_exercise_pools(exercices_choisis, objectifs_muscles, level)
+
+    # Ids des muscles : ceux de la base, puis les muscles d'objectifs inconnus
+    muscle_ids = dict(MUSCLE_IDS)
+    for muscle in objectifs_muscles:
+        muscle_ids.setdefault(muscle, len(muscle_ids))
+    n_muscles = len(muscle_ids)
+
+    goal_mask = 0
+    total = _zeros(n_muscles)
+    type_target = _zeros(2 * n_muscles)  # [2*m + POLY/ISO]
+    for muscle, targets in muscle_targets.items():
+        m = muscle_ids[muscle]
+        goal_mask |= 1 << m
+        total[m] = targets["total"]
+        type_target[2 * m] = targets["poly"]
+        type_target[2 * m + 1] = targets["iso"]
+
+    # Pools en ids (les pools ne contiennent que des exercices connus de la base)
+    pool_ids = [((), ())] * n_muscles
+    for muscle, by_type in pools.items():
+        if muscle in muscle_ids:
+            pool_ids[muscle_ids[muscle]] = (
+                tuple(EXERCISE_IDS[name] for name in by_type["poly"]),
+                tuple(EXERCISE_IDS[name] for name in by_type["iso"]),
+            )
+
+    # Séances : muscles à objectif seulement, dans l'ordre du split
+    session_muscles = [
+        tuple(muscle_ids[m] for m in split.sessions[s] if m in objectifs_muscles) for s in sessions_names
+    ]
+
+    counters = _zeros(n_muscles)
+    reached_mask = 0  # muscles dont le compteur a atteint la cible (les compteurs ne font que croître)
+    for m in range(n_muscles):
+        if goal_mask >> m & 1 and total[m] <= 0:
+            reached_mask |= 1 << m
+    type_sets = _zeros(2 * n_muscles)
+    rotation = _zeros(2 * n_muscles)
+    owned_patterns = [0] * n_muscles
+    weekly = _zeros(_N_EXERCISES)
+    session_order = [[] for _ in sessions_names]  # ids des exercices, dans l'ordre d'ajout
+    session_series = [_zeros(_N_EXERCISES) for _ in sessions_names]  # 0 = absent
+    session_owner = [_zeros(_N_EXERCISES) for _ in sessions_names]
+    session_benefits = [{} for _ in sessions_names]  # exercice -> masque des bénéficiaires
+    max_appearances = 2 if nb_jours >= 3 else nb_jours
+
+    session_idx = 0
+    iteration = 0
+    idle = 0  # séances consécutives sans ajout
+    while reached_mask & goal_mask != goal_mask and iteration < _MAX_ITERATIONS:
+        iteration += 1
+        s = session_idx % nb_jours
+        order = session_order[s]
+        series = session_series[s]
+        owner_of = session_owner[s]
+        benefits = session_benefits[s]
+        added = True
+
+        for m in session_muscles[s]:
+            bit = 1 << m
+            current = counters[m]
+            target = total[m]
+            # Tolérance de +/-1 série, comme le moteur de référence
+            if current >= target - 1:
+                continue
+
+            if type_sets[2 * m] < type_target[2 * m]:
+                vol = _POLY
+            elif type_sets[2 * m + 1] < type_target[2 * m + 1]:
+                vol = _ISO
+            else:
+                continue
+
+            # Muscles à objectif, autres que m, déjà à leur cible : un exercice qui les cible déborderait
+            blocked = goal_mask & reached_mask & ~bit
+
+            existing = -1
+            for e in order:
+                if _PRIMARY_MASKS[e] & bit and (_IS_POLY[e] if vol == _POLY else _IS_ISO[e]):
+                    if not _PRIMARY_MASKS[e] & blocked:
+                        existing = e
+                        break
+
+            if existing >= 0 and series[existing] < 4:
+                series[existing] += 2
+                t = _POLY if _IS_POLY[existing] else _ISO
+                counters[m] += 2
+                if counters[m] >= target:
+                    reached_mask |= bit
+                type_sets[2 * owner_of[existing] + t] += 2
+                beneficiaries = benefits.get(existing, 0)
+                remaining = beneficiaries
+                while remaining:
+                    low = remaining & -remaining
+                    remaining ^= low
+                    b = low.bit_length() - 1
+                    type_sets[2 * b + t] += 2
+                    if counters[b] < total[b]:
+                        counters[b] += 2
+                    if counters[b] >= total[b]:
+                        reached_mask |= low
+                        beneficiaries &= ~low
+                        type_sets[2 * b + t] -= series[existing]
+                if existing in benefits:
+                    benefits[existing] = beneficiaries
+                break
+
+            candidates = pool_ids[m][vol]
+            if not candidates:
+                if m in _SHOULDER_ARM_IDS or level == "beginner":
+                    other = pool_ids[m][1 - vol]
+                    if other:
+                        candidates = other
+                        vol = 1 - vol
+            if not candidates:
+                continue
+
+            # Patterns pas encore possédés par ce muscle d'abord
+            used = owned_patterns[m]
+            fresh = [e for e in candidates if _PATTERN_IDS[e] >= 0 and not used >> _PATTERN_IDS[e] & 1]
+            if fresh:
+                stale = [e for e in candidates if not (_PATTERN_IDS[e] >= 0 and not used >> _PATTERN_IDS[e] & 1)]
+                candidates = fresh + stale
+
+            chosen = -1
+            n_candidates = len(candidates)
+            rot = 2 * m + vol
+            for attempt in range(n_candidates):
+                candidate = candidates[rotation[rot] % n_candidates]
+                rotation[rot] += 1
+                if series[candidate]:
+                    continue
+                if weekly[candidate] >= max_appearances and attempt < n_candidates - 1:
+                    continue
+                if not _PRIMARY_MASKS[candidate] & blocked:
+                    chosen = candidate
+                    break
+            if chosen < 0:
+                for candidate in candidates:
+                    if not series[candidate]:
+                        chosen = candidate
+                        break
+            if chosen < 0:
+                continue
+
+            owner_of[chosen] = m
+            if _PATTERN_IDS[chosen] >= 0:
+                owned_patterns[m] |= 1 << _PATTERN_IDS[chosen]
+            new_beneficiaries = _PRIMARY_MASKS[chosen] & goal_mask & ~bit & ~reached_mask
+            benefits[chosen] = new_beneficiaries
+
+            initial = 4 if (target - current) / nb_jours >= 3 else 3
+            order.append(chosen)
+            series[chosen] = initial
+            weekly[chosen] += 1
+
+            t = _POLY if _IS_POLY[chosen] else _ISO
+            counters[m] += initial
+            type_sets[2 * m + t] += initial
+            if counters[m] >= target:
+                reached_mask |= bit
+            remaining = new_beneficiaries
+            while remaining:
+                low = remaining & -remaining
+                remaining ^= low
+                b = low.bit_length() - 1
+                counters[b] += initial
+                type_sets[2 * b + t] += initial
+                if counters[b] >= total[b]:
+                    reached_mask |= low
+            break
+        else:
+            added = False
+
+        session_idx += 1
+        # Un tour complet sans ajout : seuls les index de rotation bougeraient encore (ils ne
+        # décident d'aucun abandon), le moteur de référence tournerait à vide jusqu'à max_iterations
+        idle = 0 if added else idle + 1
+        if idle >= nb_jours:
+            break
+
+    programme = {}
+    for s, session_name in enumerate(sessions_names):
+        series = session_series[s]
+        kept = [e for e in session_order[s] if series[e] >= 2]
+        kept.sort(key=lambda e: (0 if _IS_POLY[e] else 1, ALL_EXERCISE_NAMES[e]))
+        programme[session_name] = [{"exercice": ALL_EXERCISE_NAMES[e], "series": series[e]} for e in kept]
+    return programme
+
@@ -0,0 +1,177 @@
+"""
+Génération de programmes en masse, hors de l'application Flask.
+
+Entrée : JSONL, un enregistrement par ligne, mêmes champs que POST /api/program
+(+ un "id" libre, recopié dans la sortie) :
+
+    {"id": "client-42", "level": "advanced", "days": 4, "goals": {"Pectoraux": "normal_growth"}, "selection": ["Bench press", 12]}
+
+Sortie : JSONL, une ligne par ligne d'entrée non vide, dans l'ordre de l'entrée :
+
+    {"line": 1, "id": "client-42", "result": {"split_name": ..., "sessions_order": [...], "programme": {...}}}
+    {"line": 2, "id": null, "error": "days doit être un entier entre 2 et 6"}
+
+Avec --session-targets, chaque "result" contient aussi "session_targets", le plan
+de volume par séance ({séance: {muscle: {"poly", "iso"}}}, voir core.volume_batch).
+
+L'entrée est lue par fenêtres de `window` lignes : la mémoire ne dépend pas de
+la taille du lot. Dans une fenêtre, chaque entrée distincte (clé canonique de
+program_cache) n'est générée qu'une fois, par un ProcessPoolExecutor : chaque
+tâche est un paquet de `chunksize` entrées passé à create_complete_program_many.
+Les résultats déjà calculés sont gardés dans un LRU pour les doublons des
+fenêtres suivantes. Les workers renvoient directement le JSON sérialisé.
+
+Usage :
+    python -m core.batch clients.jsonl -o programmes.jsonl --workers 4
+    python -m core.batch clients.jsonl -o programmes.jsonl --session-targets
+    cat clients.jsonl | python -m core.batch - > programmes.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .api import ApiError, parse_program_request
+from .program_cache import ProgramCache, canonical_key
+from .prog import create_complete_program_many
+
+DEFAULT_CHUNKSIZE = 16
+DEFAULT_DEDUPE_SIZE = 4096
+
+
+def generate_json_many(requests, session_targets=False):
+    """Paquet d'entrées (nb_jours, objectifs, sélection, niveau) -> objets "result" déjà sérialisés (exécuté dans un worker)"""
+    results = []
+    for result in create_complete_program_many(requests, with_session_targets=session_targets):
+        obj = {"split_name": result[1], "sessions_order": result[2], "programme": result[0]}
+        if session_targets:
+            obj["session_targets"] = result[3]
+        results.append(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+    return results
+
+
+def generate_json(inputs, session_targets=False):
+    """Une entrée -> objet "result" déjà sérialisé"""
+    return generate_json_many([inputs], session_targets)[0]
+
+
+def parse_line(text):
+    """Ligne JSONL -> (id, entrées, erreur) ; entrées None si l'enregistrement est invalide"""
+    try:
+        record = json.loads(text)
+    except ValueError:
+        return None, None, "JSON invalide"
+    record_id = record.get("id") if isinstance(record, dict) else None
+    try:
+        return record_id, parse_program_request(record), None
+    except ApiError as exc:
+        return record_id, None, str(exc)
+
+
+def _output_line(line_no, record_id, result=None, error=None):
+    head = json.dumps({"line": line_no, "id": record_id}, ensure_ascii=False, separators=(",", ":"))[:-1]
+    if error is not None:
+        return f'{head},"error":{json.dumps(error, ensure_ascii=False)}}}\n'
+    return f'{head},"result":{result}}}\n'
+
+
+def run_batch(lines, out, workers=None, chunksize=DEFAULT_CHUNKSIZE, window=None, dedupe_size=DEFAULT_DEDUPE_SIZE,
+              session_targets=False):
+    """
+    Lit `lines` (itérable de lignes JSONL), écrit les résultats dans `out`.
+    workers=0 : tout dans le processus courant. session_targets=True ajoute le plan
+    par séance à chaque résultat. Renvoie les compteurs et le débit.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    window = window or max(1, workers) * chunksize * 8
+    results = ProgramCache(maxsize=dedupe_size, ttl=float("inf"))
+    stats = {"records": 0, "generated": 0, "duplicates": 0, "errors": 0}
+    numbered = ((no, text) for no, text in enumerate(lines, 1) if text.strip())
+
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        while True:
+            batch = list(itertools.islice(numbered, window))
+            if not batch:
+                break
+            parsed = []
+            todo = {}  # clé -> entrées, entrées distinctes à générer dans cette fenêtre
+            for line_no, text in batch:
+                record_id, inputs, error = parse_line(text)
+                if error is not None:
+                    parsed.append((line_no, record_id, None, None, error))
+                    continue
+                key = canonical_key(*inputs)
+                if key not in todo and results.get(key) is None:
+                    todo[key] = inputs
+                else:
+                    stats["duplicates"] += 1
+                parsed.append((line_no, record_id, key, inputs, None))
+
+            if todo:
+                requests = list(todo.values())
+                chunks = [requests[i:i + chunksize] for i in range(0, len(requests), chunksize)]
+                generate = partial(generate_json_many, session_targets=session_targets)
+                generated = itertools.chain.from_iterable(
+                    map(generate, chunks) if pool is None else pool.map(generate, chunks))
+                for key, result in zip(todo, generated):
+                    results.put(key, result)
+                stats["generated"] += len(todo)
+
+            for line_no, record_id, key, inputs, error in parsed:
+                stats["records"] += 1
+                if error is not None:
+                    stats["errors"] += 1
+                    out.write(_output_line(line_no, record_id, error=error))
+                    continue
+                result = results.get(key)
+                if result is None:
+                    # Évincé du LRU dans la même fenêtre (dedupe_size < window) : recalcul local
+                    result = generate_json(inputs, session_targets)
+                    results.put(key, result)
+                out.write(_output_line(line_no, record_id, result=result))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = elapsed
+    stats["programs_per_sec"] = stats["records"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génération de programmes en masse (JSONL -> JSONL)")
+    parser.add_argument("input", help="fichier JSONL, ou - pour l'entrée standard")
+    parser.add_argument("-o", "--output", default="-", help="fichier JSONL de sortie (- : sortie standard)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus (0 : aucun)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--window", type=int, default=None, help="lignes lues à la fois")
+    parser.add_argument("--dedupe-size", type=int, default=DEFAULT_DEDUPE_SIZE, help="résultats gardés pour les doublons")
+    parser.add_argument("--session-targets", action="store_true", help="ajouter le plan de volume par séance")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(source, out, args.workers, args.chunksize, args.window, args.dedupe_size,
+                          args.session_targets)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"{stats['records']} enregistrements, {stats['generated']} générés, {stats['duplicates']} doublons, "
+          f"{stats['errors']} erreurs en {stats['seconds']:.2f} s ({stats['programs_per_sec']:.0f} programmes/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Encodage compact des sélections d'exercices et des objectifs musculaires.
+
+  - chaque exercice a un id entier stable : sa position dans EXERCISE_DATABASE
+    (EXERCISE_IDS) ; une sélection devient un masque de bits (bit i = exercice i)
+  - une carte d'objectifs devient un entier, 2 bits par muscle de MUSCLE_INFO
+    (0 = non défini, 1 = maintenance, 2 = normal_growth, 3 = prioritised_growth)
+
+Les deux formes ont une version texte en base64 URL-safe sans padding, utilisable
+dans une URL ou une clé de cache.
+
+Les ids dépendent de l'ordre de la base : un nouvel exercice doit être ajouté
+à la fin de EXERCISE_DATABASE (un nouveau muscle à la fin de MUSCLE_INFO) pour
+que les codes déjà émis restent valides.
+
+    >>> code = encode_selection(["Bench press", "Curl"])
+    >>> decode_selection(code)
+    ['Bench press', 'Curl']
+"""
+
+import base64
+import binascii
+
+from .exercise_database import ALL_EXERCISE_NAMES, EXERCISE_IDS, MUSCLE_INFO
+
+GOAL_MUSCLES = tuple(MUSCLE_INFO.keys())
+GOAL_CODES = {"maintenance": 1, "normal_growth": 2, "prioritised_growth": 3}
+GOAL_NAMES = {code: goal for goal, code in GOAL_CODES.items()}
+_MUSCLE_SHIFTS = {muscle: 2 * i for i, muscle in enumerate(GOAL_MUSCLES)}
+
+
+class EncodingError(ValueError):
+    """Exercice, muscle ou objectif inconnu, ou code mal formé"""
+
+
+# ---------- Sélections ----------
+
+def selection_to_mask(names):
+    """Liste de noms -> masque (l'ordre et les doublons sont ignorés)"""
+    mask = 0
+    for name in names:
+        try:
+            mask |= 1 << EXERCISE_IDS[name]
+        except KeyError:
+            raise EncodingError(f"exercice inconnu : {name!r}") from None
+    return mask
+
+
+def mask_to_selection(mask):
+    """Masque -> liste de noms, dans l'ordre de la base"""
+    if mask < 0 or mask.bit_length() > len(ALL_EXERCISE_NAMES):
+        raise EncodingError(f"masque hors de la base : {mask}")
+    names = []
+    while mask:
+        low = mask & -mask
+        names.append(ALL_EXERCISE_NAMES[low.bit_length() - 1])
+        mask ^= low
+    return names
+
+
+# ---------- Objectifs ----------
+
+def goals_to_code(goals):
+    """{muscle: objectif} -> entier (les objectifs None sont traités comme non définis)"""
+    code = 0
+    for muscle, goal in goals.items():
+        if goal is None:
+            continue
+        try:
+            code |= GOAL_CODES[goal] << _MUSCLE_SHIFTS[muscle]
+        except (KeyError, TypeError):
+            raise EncodingError(f"objectif inconnu : {muscle!r} -> {goal!r}") from None
+    return code
+
+
+def code_to_goals(code):
+    """Entier -> {muscle: objectif}, dans l'ordre de MUSCLE_INFO"""
+    if code < 0 or code.bit_length() > 2 * len(GOAL_MUSCLES):
+        raise EncodingError(f"code d'objectifs hors limites : {code}")
+    goals = {}
+    for muscle, shift in _MUSCLE_SHIFTS.items():
+        value = code >> shift & 0b11
+        if value:
+            goals[muscle] = GOAL_NAMES[value]
+    return goals
+
+
+# ---------- Forme texte ----------
+
+def int_to_b64(value):
+    """Entier positif -> base64 URL-safe sans padding (octets big-endian)"""
+    raw = value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def b64_to_int(text):
+    if not isinstance(text, str) or "+" in text or "/" in text:
+        raise EncodingError(f"base64 invalide : {text!r}")
+    try:
+        raw = base64.b64decode(text + "=" * (-len(text) % 4), altchars=b"-_", validate=True)
+    except (binascii.Error, ValueError, TypeError):
+        raise EncodingError(f"base64 invalide : {text!r}") from None
+    return int.from_bytes(raw, "big")
+
+
+def encode_selection(names):
+    return int_to_b64(selection_to_mask(names))
+
+
+def decode_selection(text):
+    return mask_to_selection(b64_to_int(text))
+
+
+def encode_goals(goals):
+    return int_to_b64(goals_to_code(goals))
+
+
+def decode_goals(text):
+    return code_to_goals(b64_to_int(text))
+
+
+# ---------- Code de partage d'un programme ----------
+
+SHARE_CODE_VERSION = "1"
+SHARE_LEVELS = ("beginner", "advanced")
+SHARE_MIN_DAYS, SHARE_MAX_DAYS = 2, 6
+_GOAL_BITS = 2 * len(GOAL_MUSCLES)
+
+
+def encode_program_code(nb_jours, objectifs_muscles, exercices_choisis, level):
+    """
+    Toutes les entrées d'un programme dans un seul jeton URL-safe :
+    version + base64(masque | objectifs | niveau (1 bit) | jours (3 bits)).
+    """
+    if nb_jours not in range(SHARE_MIN_DAYS, SHARE_MAX_DAYS + 1):
+        raise EncodingError(f"nombre de jours hors limites : {nb_jours!r}")
+    if level not in SHARE_LEVELS:
+        raise EncodingError(f"niveau inconnu : {level!r}")
+    value = selection_to_mask(exercices_choisis)
+    value = value << _GOAL_BITS | goals_to_code(objectifs_muscles)
+    value = value << 1 | SHARE_LEVELS.index(level)
+    value = value << 3 | nb_jours
+    return SHARE_CODE_VERSION + int_to_b64(value)
+
+
+def decode_program_code(code):
+    """Inverse de encode_program_code : (nb_jours, objectifs_muscles, exercices_choisis, level)"""
+    if not code or code[0] != SHARE_CODE_VERSION:
+        raise EncodingError(f"code de partage inconnu : {code!r}")
+    value = b64_to_int(code[1:])
+    nb_jours = value & 0b111
+    if nb_jours not in range(SHARE_MIN_DAYS, SHARE_MAX_DAYS + 1):
+        raise EncodingError(f"nombre de jours hors limites : {nb_jours}")
+    level = SHARE_LEVELS[value >> 3 & 1]
+    goals = code_to_goals(value >> 4 & ((1 << _GOAL_BITS) - 1))
+    selection = mask_to_selection(value >> (4 + _GOAL_BITS))
+    return nb_jours, goals, selection, level
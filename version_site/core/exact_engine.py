@@ -0,0 +1,299 @@
+"""
+Moteur "exact" : allocation optimale des séries, hors ligne, sans solveur externe.
+
+Mêmes règles que generate_workout_program :
+  - cibles hebdomadaires par muscle (total, poly, iso de compute_muscle_targets)
+  - exercices des pools de build_exercise_pools ; un exercice n'est posé que dans
+    une séance qui travaille un de ses muscles "propriétaires" (muscle à objectif
+    pour lequel son type est autorisé, comme dans le moteur glouton)
+  - 2 à 4 séries par exercice et par séance, au plus 2 apparitions par semaine
+    (nb_jours si moins de 3 jours), une seule ligne par exercice et par séance
+  - poly avant iso dans l'affichage
+Les séries d'un exercice comptent pour tous ses muscles principaux à objectif.
+
+Coût minimisé, dans l'ordre (poids lexicographiques) :
+  1. somme des écarts |volume - total| par muscle (manque ou dépassement)
+  2. somme des écarts poly et iso par muscle
+  3. nombre de lignes (exercice, séance)
+
+Résolution en deux temps :
+  1. Volume hebdomadaire par classe d'exercices interchangeables (même type,
+     mêmes muscles à objectif, mêmes propriétaires). Une classe de k apparitions
+     possibles peut fournir 0 ou 2..4k séries (en ceil(t / 4) lignes au moins).
+     Recherche en profondeur sur les classes, mémoïsée sur l'état de la
+     "frontière" : séries poly / iso des muscles déjà touchés et encore touchés
+     par une classe suivante. Un muscle sort de l'état (et son coût est compté)
+     après sa dernière classe. Une classe n'a jamais intérêt à dépasser la plus
+     grande cible de ses muscles : cela borne les branches.
+  2. Placement : les séries d'une classe sont découpées en lignes de 2 à 4,
+     réparties sur ses exercices (patterns différents d'abord), puis chaque ligne
+     va dans la séance autorisée la moins chargée. Ce placement ne change pas le
+     coût ; il équilibre seulement la semaine.
+
+Le résultat est optimal pour ce coût, mais diffère du moteur glouton : le
+programme n'est pas le même. create_complete_program(..., engine="exact").
+"""
+
+from typing import Dict, List
+
+from .exercise_database import EXERCISE_RECORDS, PATTERN_IDS
+from .prog import Level, Objectif, _poly_first_key, build_exercise_pools, compute_muscle_targets, create_prog
+
+MAX_SERIES = 4
+MIN_SERIES = 2
+_W_TOTAL = 1_000_000
+_W_TYPE = 1_000
+
+
+class _ExerciseClass:
+    """Exercices interchangeables pour le coût : même type, mêmes muscles à objectif, mêmes propriétaires"""
+
+    __slots__ = ("is_poly", "muscles", "sessions", "members", "capacity", "max_series")
+
+    def __init__(self, is_poly, muscles, sessions):
+        self.is_poly = is_poly
+        self.muscles = muscles  # indices des muscles à objectif travaillés
+        self.sessions = sessions  # indices des séances autorisées
+        self.members = []  # noms, dans l'ordre des pools
+        self.capacity = 0  # apparitions hebdomadaires possibles
+        self.max_series = 0
+
+
+def _allowed_types(muscle, pools, objectif, level):
+    """Types d'exercice qu'un muscle peut "posséder", comme dans le moteur glouton"""
+    targets = compute_muscle_targets({muscle: objectif}, level)[muscle]
+    wanted = [t for t in ("poly", "iso") if targets[t] > 0]
+    allowed = {t for t in wanted if pools[muscle][t]}
+    if muscle in ("Biceps", "Triceps", "Epaules") or level == "beginner":
+        # Repli sur l'autre type quand le type voulu n'a aucun exercice
+        for t in wanted:
+            other = "iso" if t == "poly" else "poly"
+            if not pools[muscle][t] and pools[muscle][other]:
+                allowed.add(other)
+    return allowed
+
+
+def _build_classes(sessions_names, split, objectifs_muscles, pools, level, max_appearances, muscle_index, totals):
+    classes = {}
+    allowed = {m: _allowed_types(m, pools, objectifs_muscles[m], level) for m in objectifs_muscles}
+    seen = set()
+    for muscle in objectifs_muscles:
+        for vol_type in ("poly", "iso"):
+            for name in pools[muscle][vol_type]:
+                if name in seen:
+                    continue
+                record = EXERCISE_RECORDS[name]
+                exo_type = "poly" if record.is_poly else "iso"
+                goal_muscles = tuple(sorted({muscle_index[m] for m in record.primary_muscles if m in muscle_index}))
+                owners = {m for m in record.primary_muscles if m in allowed and exo_type in allowed[m]
+                          and name in pools[m][exo_type]}
+                if not owners:
+                    continue
+                seen.add(name)
+                sessions = tuple(s for s, session in enumerate(sessions_names)
+                                 if any(m in split.sessions[session] for m in owners))
+                if not sessions:
+                    continue
+                key = (record.is_poly, goal_muscles, sessions)
+                cls = classes.get(key)
+                if cls is None:
+                    cls = classes[key] = _ExerciseClass(record.is_poly, goal_muscles, sessions)
+                cls.members.append(name)
+                cls.capacity += min(max_appearances, len(sessions))
+    for cls in classes.values():
+        # Au-delà de la plus grande cible de ses muscles, chaque série en plus ne fait qu'augmenter le coût
+        cls.max_series = min(MAX_SERIES * cls.capacity, max(totals[m] for m in cls.muscles))
+    return list(classes.values())
+
+
+def _order_classes(classes):
+    """Ordre de recherche : ouvrir le moins de nouveaux muscles à chaque pas (frontière étroite)"""
+    remaining = list(classes)
+    ordered = []
+    opened = set()
+    while remaining:
+        best = min(remaining, key=lambda c: (len(set(c.muscles) - opened), -len(c.muscles), remaining.index(c)))
+        remaining.remove(best)
+        ordered.append(best)
+        opened.update(best.muscles)
+    return ordered
+
+
+def _muscle_cost(poly, iso, target):
+    total, poly_target, iso_target = target
+    return _W_TOTAL * abs(poly + iso - total) + _W_TYPE * (abs(poly - poly_target) + abs(iso - iso_target))
+
+
+def _entries(series):
+    return -(-series // MAX_SERIES)
+
+
+def solve_class_series(classes, targets):
+    """
+    Séries hebdomadaires optimales par classe (dans l'ordre de `classes`) et coût.
+    targets[m] = (total, poly, iso) ; recherche mémoïsée sur la frontière.
+    """
+    n = len(classes)
+    last_use = {}
+    for i, cls in enumerate(classes):
+        for m in cls.muscles:
+            last_use[m] = i
+    # Frontière avant la classe i : muscles touchés par une classe < i et par une classe >= i
+    frontiers = []
+    open_muscles = []
+    for i in range(n + 1):
+        frontiers.append(tuple(open_muscles))
+        if i < n:
+            for m in classes[i].muscles:
+                if m not in open_muscles:
+                    open_muscles.append(m)
+            open_muscles = [m for m in open_muscles if last_use[m] > i]
+    untouched = sum(_muscle_cost(0, 0, targets[m]) for m in range(len(targets)) if m not in last_use)
+
+    choices = [
+        (0,) + tuple(range(MIN_SERIES, cls.max_series + 1)) if cls.max_series >= MIN_SERIES else (0,)
+        for cls in classes
+    ]
+    memo = {}
+
+    def best(i, state):
+        # state : (poly, iso) par muscle de frontiers[i], à plat
+        if i == n:
+            return 0, ()
+        key = (i, state)
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+        cls = classes[i]
+        values = dict(zip(frontiers[i], zip(state[::2], state[1::2])))
+        result = None
+        for series in choices[i]:
+            after = dict(values)
+            for m in cls.muscles:
+                poly, iso = after.get(m, (0, 0))
+                after[m] = (poly + series, iso) if cls.is_poly else (poly, iso + series)
+            cost = _entries(series)
+            for m in cls.muscles:
+                if last_use[m] == i:
+                    cost += _muscle_cost(*after[m], targets[m])
+            if result is not None and cost >= result[0]:
+                continue
+            next_state = tuple(v for m in frontiers[i + 1] for v in after[m])
+            rest_cost, rest = best(i + 1, next_state)
+            cost += rest_cost
+            if result is None or cost < result[0]:
+                result = (cost, (series,) + rest)
+        memo[key] = result
+        return result
+
+    cost, series = best(0, ())
+    return cost + untouched, series
+
+
+def _split_series(series):
+    """t séries -> ceil(t / 4) lignes de 2 à 4 séries, les plus grosses d'abord"""
+    count = _entries(series)
+    base, extra = divmod(series, count)
+    return [base + (i < extra) for i in range(count)]
+
+
+def _member_rotation(members):
+    """Membres d'une classe, un pattern différent à chaque tour"""
+    by_pattern = {}
+    for name in members:
+        by_pattern.setdefault(EXERCISE_RECORDS[name].pattern, []).append(name)
+    groups = list(by_pattern.values())
+    ordered = []
+    for rank in range(max(len(g) for g in groups)):
+        ordered.extend(g[rank] for g in groups if rank < len(g))
+    return ordered
+
+
+def generate_workout_program_exact(nb_jours: int,
+                                   objectifs_muscles: Dict[str, Objectif],
+                                   exercices_choisis: List[str],
+                                   level: Level = "advanced"):
+    """Même contrat que prog.generate_workout_program ; répartition optimale pour le coût du module"""
+    split = create_prog(nb_jours)
+    sessions_names = list(split.sessions.keys())[:nb_jours]
+    muscle_targets = compute_muscle_targets(objectifs_muscles, level)
+    pools, _ = build_exercise_pools(exercices_choisis, objectifs_muscles, level)
+    max_appearances = 2 if nb_jours >= 3 else nb_jours
+
+    goal_names = list(objectifs_muscles)
+    muscle_index = {m: i for i, m in enumerate(goal_names)}
+    targets = [(muscle_targets[m]["total"], muscle_targets[m]["poly"], muscle_targets[m]["iso"]) for m in goal_names]
+    totals = [t[0] for t in targets]
+
+    classes = _order_classes(_build_classes(
+        sessions_names, split, objectifs_muscles, pools, level, max_appearances, muscle_index, totals))
+    _, class_series = solve_class_series(classes, targets)
+
+    # Lignes (exercice, séries, séances autorisées), puis placement dans la séance la moins chargée
+    entries = []
+    for cls, series in zip(classes, class_series):
+        if not series:
+            continue
+        members = _member_rotation(cls.members)
+        appearances = {name: 0 for name in members}
+        cap = min(max_appearances, len(cls.sessions))
+        turn = 0
+        for sets in _split_series(series):
+            while appearances[members[turn % len(members)]] >= cap:
+                turn += 1
+            name = members[turn % len(members)]
+            appearances[name] += 1
+            turn += 1
+            entries.append((name, sets, cls.sessions))
+
+    load = [0] * len(sessions_names)
+    placed = [dict() for _ in sessions_names]
+    entries.sort(key=lambda e: (len(e[2]), -e[1], PATTERN_IDS.get(EXERCISE_RECORDS[e[0]].pattern, -1), e[0]))
+    for name, sets, allowed_sessions in entries:
+        session = min((s for s in allowed_sessions if name not in placed[s]), key=lambda s: (load[s], s))
+        placed[session][name] = sets
+        load[session] += sets
+
+    programme = {}
+    for s, session_name in enumerate(sessions_names):
+        programme[session_name] = sorted(
+            ({"exercice": name, "series": sets} for name, sets in placed[s].items()), key=_poly_first_key)
+    return programme
+
+
+def program_cost(programme, objectifs_muscles, level="advanced"):
+    """
+    Mesures d'un programme, pour comparer les moteurs :
+    écart total, dépassement, écart poly / iso, lignes, lignes à plus de 4 séries,
+    exercices au-delà de 2 apparitions.
+    """
+    muscle_targets = compute_muscle_targets(objectifs_muscles, level)
+    volumes = {m: [0, 0] for m in objectifs_muscles}
+    appearances = {}
+    lines = over_cap = 0
+    for session_entries in programme.values():
+        for entry in session_entries:
+            record = EXERCISE_RECORDS[entry["exercice"]]
+            lines += 1
+            over_cap += entry["series"] > MAX_SERIES
+            appearances[record.name] = appearances.get(record.name, 0) + 1
+            for m in record.primary_muscles:
+                if m in volumes:
+                    volumes[m][0 if record.is_poly else 1] += entry["series"]
+    deviation = overshoot = type_deviation = 0
+    for m, (poly, iso) in volumes.items():
+        target = muscle_targets[m]
+        deviation += abs(poly + iso - target["total"])
+        overshoot += max(0, poly + iso - target["total"])
+        type_deviation += abs(poly - target["poly"]) + abs(iso - target["iso"])
+    nb_jours = len(programme)
+    max_appearances = 2 if nb_jours >= 3 else nb_jours
+    return {
+        "deviation": deviation,
+        "overshoot": overshoot,
+        "type_deviation": type_deviation,
+        "lines": lines,
+        "over_cap": over_cap,
+        "over_appearances": sum(count > max_appearances for count in appearances.values()),
+    }
+
@@ -3,6 +3,11 @@ Base de données centralisée de tous les exercices
 Chaque exercice est défini une seule fois avec toutes ses propriétés
 """
 
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import FrozenSet, Optional, Tuple
+
 EXERCISE_DATABASE = {
     # PUSH - Horizontal Push (Chest)
     "Bench press": {
@@ -547,29 +552,79 @@ EXERCISE_DATABASE = {
     }
 }
 
+def _as_tuple(value):
+    """Normalise un champ qui peut être une chaîne ou une liste en tuple"""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+def build_exercise_indexes(database):
+    """
+    Construit les index immuables d'une base d'exercices :
+      indexes["muscle"][muscle]         -> exercices qui travaillent ce muscle (all_muscles)
+      indexes["primary_muscle"][muscle] -> exercices dont c'est un muscle principal
+      indexes["pattern"][pattern]       -> exercices de ce pattern
+      indexes["type"][type]             -> exercices de ce type (polyarticulaire, isolation)
+      indexes["category"][category]     -> exercices de cette catégorie (push, pull, legs, core)
+      indexes["equipment"][equipment]   -> exercices utilisant cet équipement
+    Chaque liste garde l'ordre de la base et est figée en tuple.
+    """
+    fields = {
+        "muscle": lambda info: _as_tuple(info.get("all_muscles")),
+        "primary_muscle": lambda info: _as_tuple(info.get("primary_muscles")),
+        "pattern": lambda info: _as_tuple(info.get("pattern")),
+        "type": lambda info: _as_tuple(info.get("type")),
+        "category": lambda info: _as_tuple(info.get("category")),
+        "equipment": lambda info: _as_tuple(info.get("equipment")),
+    }
+    indexes = {}
+    for index_name, keys_of in fields.items():
+        buckets = {}
+        for name, info in database.items():
+            for key in dict.fromkeys(keys_of(info)):
+                buckets.setdefault(key, []).append(name)
+        indexes[index_name] = MappingProxyType({key: tuple(names) for key, names in buckets.items()})
+    return MappingProxyType(indexes)
+
+# Index construits une seule fois à l'import
+EXERCISE_INDEXES = build_exercise_indexes(EXERCISE_DATABASE)
+ALL_EXERCISE_NAMES = tuple(EXERCISE_DATABASE.keys())
+# Identifiant entier stable de chaque exercice (position dans la base)
+EXERCISE_IDS = MappingProxyType({name: idx for idx, name in enumerate(ALL_EXERCISE_NAMES)})
+
 def get_exercise_info(exercise_name):
     """Récupère toutes les informations d'un exercice"""
     return EXERCISE_DATABASE.get(exercise_name, None)
 
 def get_all_exercises():
     """Récupère tous les noms d'exercices"""
-    return list(EXERCISE_DATABASE.keys())
+    return list(ALL_EXERCISE_NAMES)
 
 def get_exercises_by_category(category):
     """Récupère tous les exercices d'une catégorie (push, pull, legs, core)"""
-    return [name for name, info in EXERCISE_DATABASE.items() if info["category"] == category]
+    return EXERCISE_INDEXES["category"].get(category, ())
 
 def get_exercises_by_type(exercise_type):
     """Récupère tous les exercices d'un type (polyarticulaire, isolation)"""
-    return [name for name, info in EXERCISE_DATABASE.items() if info["type"] == exercise_type]
+    return EXERCISE_INDEXES["type"].get(exercise_type, ())
 
 def get_exercises_by_pattern(pattern):
     """Récupère tous les exercices d'un pattern donné"""
-    return [name for name, info in EXERCISE_DATABASE.items() if info["pattern"] == pattern]
+    return EXERCISE_INDEXES["pattern"].get(pattern, ())
 
 def get_exercises_by_muscle(muscle):
     """Récupère tous les exercices qui travaillent un muscle donné"""
-    return [name for name, info in EXERCISE_DATABASE.items() if muscle in info["all_muscles"]]
+    return EXERCISE_INDEXES["muscle"].get(muscle, ())
+
+def get_exercises_by_primary_muscle(muscle):
+    """Récupère tous les exercices dont ce muscle est un muscle principal"""
+    return EXERCISE_INDEXES["primary_muscle"].get(muscle, ())
+
+def get_exercises_by_equipment(equipment):
+    """Récupère tous les exercices qui utilisent un équipement donné"""
+    return EXERCISE_INDEXES["equipment"].get(equipment, ())
 
 def is_polyarticular(exercise_name):
     """Vérifie si un exercice est polyarticulaire"""
@@ -667,6 +722,78 @@ def get_muscles_by_category(category):
     """Récupère les muscles par catégorie (upper, lower, core)"""
     return [name for name, info in MUSCLE_INFO.items() if info["category"] == category]
 
+
+# ---------- Représentation compilée (construite à l'import) ----------
+
+@dataclass(frozen=True, slots=True)
+class ExerciseRecord:
+    """
+    Fiche compacte et immuable d'un exercice, pour le générateur.
+    Chaînes internées ; muscles en tuples (ordre de la base) et frozenset (tests `in`).
+    """
+    id: int
+    name: str
+    category: str
+    pattern: Optional[str]
+    pattern_id: int
+    type: str
+    is_poly: bool
+    primary_muscles: Tuple[str, ...]
+    primary_muscle_ids: Tuple[int, ...]
+    primary_set: FrozenSet[str]
+    secondary_muscles: Tuple[str, ...]
+    all_muscles: FrozenSet[str]
+    equipment: Tuple[str, ...]
+    image_path: Optional[str]
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+# Identifiants entiers des muscles (ordre de MUSCLE_INFO, puis muscles cités seulement dans la base)
+# et des patterns (ordre d'apparition dans la base)
+MUSCLE_IDS = MappingProxyType({
+    _intern(muscle): idx for idx, muscle in enumerate(dict.fromkeys(
+        list(MUSCLE_INFO) + [m for info in EXERCISE_DATABASE.values() for m in _as_tuple(info.get("all_muscles"))]
+    ))
+})
+PATTERN_IDS = MappingProxyType({
+    _intern(pattern): idx for idx, pattern in enumerate(dict.fromkeys(
+        info["pattern"] for info in EXERCISE_DATABASE.values() if info.get("pattern")
+    ))
+})
+
+def compile_exercise_record(exercise_id, name, info):
+    primary = tuple(_intern(m) for m in _as_tuple(info.get("primary_muscles")))
+    pattern = _intern(info.get("pattern"))
+    exercise_type = _intern(info.get("type", "polyarticulaire"))
+    return ExerciseRecord(
+        id=exercise_id,
+        name=_intern(name),
+        category=_intern(info.get("category")),
+        pattern=pattern,
+        pattern_id=PATTERN_IDS.get(pattern, -1),
+        type=exercise_type,
+        is_poly=exercise_type == "polyarticulaire",
+        primary_muscles=primary,
+        primary_muscle_ids=tuple(MUSCLE_IDS[m] for m in primary),
+        primary_set=frozenset(primary),
+        secondary_muscles=tuple(_intern(m) for m in _as_tuple(info.get("secondary_muscles"))),
+        all_muscles=frozenset(_intern(m) for m in _as_tuple(info.get("all_muscles"))),
+        equipment=tuple(_intern(e) for e in _as_tuple(info.get("equipment"))),
+        image_path=info.get("image_path"),
+    )
+
+# Fiches par nom et par id ; get_exercise_info reste la vue dict de compatibilité
+EXERCISE_RECORD_LIST = tuple(
+    compile_exercise_record(idx, name, info) for idx, (name, info) in enumerate(EXERCISE_DATABASE.items())
+)
+EXERCISE_RECORDS = MappingProxyType({record.name: record for record in EXERCISE_RECORD_LIST})
+
+def get_exercise_record(exercise_name):
+    """Fiche compilée d'un exercice (None si inconnu)"""
+    return EXERCISE_RECORDS.get(exercise_name)
+
 # Objectifs de volume centralisés
 VOLUME_TARGETS = {
     "maintenance": {
@@ -695,8 +822,8 @@ def get_all_volume_goals():
     return list(VOLUME_TARGETS.keys())
 
 def get_muscle_list_with_images():
-    """Génère la liste des muscles avec leurs images depuis la base centralisée"""
-    return [(name, info["image_path"]) for name, info in MUSCLE_INFO.items()]
+    """Liste des muscles avec leurs images (tuple figé, construit à l'import)"""
+    return MUSCLE_LIST
 
 # Mapping des noms de patterns vers les noms d'interface
 PATTERN_INTERFACE_NAMES = {
@@ -721,8 +848,8 @@ def get_interface_pattern_name(pattern):
     """Récupère le nom d'interface pour un pattern donné"""
     return PATTERN_INTERFACE_NAMES.get(pattern, pattern)
 
-def get_pattern_list_for_interface():
-    """Génère la liste des patterns groupés par nom d'interface"""
+def _build_pattern_groups():
+    """Groupe les exercices par pattern, puis par nom d'interface"""
     patterns = {}
     
     # Grouper les exercices par pattern
@@ -740,4 +867,12 @@ def get_pattern_list_for_interface():
             interface_patterns[interface_name] = []
         interface_patterns[interface_name].extend(exercises)
     
-    return [(name, exercises) for name, exercises in interface_patterns.items() if exercises]
\ No newline at end of file
+    return tuple((name, tuple(exercises)) for name, exercises in interface_patterns.items() if exercises)
+
+# Listes d'interface construites une seule fois à l'import (la base ne change pas à l'exécution)
+MUSCLE_LIST = tuple((name, info["image_path"]) for name, info in MUSCLE_INFO.items())
+PATTERN_GROUPS = _build_pattern_groups()
+
+def get_pattern_list_for_interface():
+    """Patterns groupés par nom d'interface : ((nom, ((exercice, image), ...)), ...)"""
+    return PATTERN_GROUPS
@@ -0,0 +1,125 @@
+"""
+Résolution des chemins d'images (/media/<path>) vers les fichiers du dépôt.
+
+Les images viennent de version_tkinter/images (chemins "images/...") et de
+version_site/exercices2 (chemins "exercices2/...").
+
+build_media_manifest précalcule cette résolution au démarrage pour que la
+route /media ne touche plus au système de fichiers.
+"""
+
+import hashlib
+import mimetypes
+import os
+from datetime import datetime, timezone
+
+from werkzeug.http import http_date
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+TK_IMAGES_ROOT = os.path.normpath(os.path.join(PROJECT_ROOT, "version_tkinter", "images"))
+SITE_EXERCICES2_ROOT = os.path.normpath(os.path.join(PROJECT_ROOT, "version_site", "exercices2"))
+
+
+def _inside_project(path):
+    """Vrai si `path` (liens résolus) est dans le dépôt"""
+    real = os.path.realpath(path)
+    return os.path.commonpath([real, PROJECT_ROOT]) == PROJECT_ROOT
+
+
+def safe_join_root(rel_path):
+    """Chemin absolu du fichier image pour un chemin logique, ou None (jamais hors du dépôt)"""
+    if "\0" in rel_path:
+        return None
+    candidates = [
+        # Relatif à la racine du dépôt (ou absolu)
+        os.path.normpath(os.path.join(PROJECT_ROOT, rel_path)),
+        # Sous version_tkinter (chemins "images/...")
+        os.path.normpath(os.path.join(PROJECT_ROOT, "version_tkinter", rel_path)),
+    ]
+    if rel_path.startswith("images"):
+        candidates.append(os.path.normpath(os.path.join(TK_IMAGES_ROOT, os.path.relpath(rel_path, "images"))))
+    # Dans version_site/exercices2 (nouveaux exercices)
+    if rel_path.startswith("exercices2/"):
+        candidates.append(os.path.normpath(os.path.join(SITE_EXERCICES2_ROOT, os.path.relpath(rel_path, "exercices2"))))
+    candidates.append(os.path.normpath(os.path.join(SITE_EXERCICES2_ROOT, os.path.basename(rel_path))))
+
+    for candidate in candidates:
+        if _inside_project(candidate) and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+# ---------- Manifeste construit au démarrage ----------
+
+class MediaEntry:
+    """Fichier image résolu, avec ses en-têtes HTTP précalculés"""
+
+    __slots__ = ("path", "data", "etag", "last_modified", "size", "mimetype", "headers")
+
+    def __init__(self, path, data, etag, last_modified, size, mimetype, max_age):
+        self.path = path
+        self.data = data  # None si le fichier n'est pas gardé en mémoire
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+        self.mimetype = mimetype
+        self.headers = [
+            ("Content-Type", mimetype),
+            ("Content-Length", str(size)),
+            ("ETag", f'"{etag}"'),
+            ("Last-Modified", http_date(last_modified)),
+            ("Cache-Control", f"public, max-age={max_age}"),
+        ]
+
+
+def _logical_media_paths():
+    """Tous les chemins logiques connus : fichiers des dossiers d'images + chemins de la base"""
+    from .exercise_database import EXERCISE_DATABASE, MUSCLE_INFO
+
+    paths = set()
+    for root, prefix in ((TK_IMAGES_ROOT, "images"), (SITE_EXERCICES2_ROOT, "exercices2"),
+                         (os.path.join(PROJECT_ROOT, "images"), "images")):
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                rel = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+                paths.add(f"{prefix}/{rel}")
+    for info in list(EXERCISE_DATABASE.values()) + list(MUSCLE_INFO.values()):
+        if info.get("image_path"):
+            paths.add(info["image_path"])
+    return paths
+
+
+def build_media_manifest(max_age=7 * 24 * 3600, memory_budget=64 * 1024 * 1024, max_file_size=4 * 1024 * 1024):
+    """
+    Résout une fois pour toutes chaque chemin logique avec safe_join_root (même
+    résolution que la route), lit les fichiers et précalcule ETag / Last-Modified /
+    Content-Length / Cache-Control. Les fichiers sont gardés en mémoire tant que
+    `memory_budget` n'est pas atteint.
+    """
+    manifest = {}
+    by_real_path = {}
+    used = 0
+    for logical in sorted(_logical_media_paths()):
+        real = safe_join_root(logical)
+        if real is None or not os.path.isfile(real):
+            continue
+        entry = by_real_path.get(real)
+        if entry is None:
+            with open(real, "rb") as f:
+                data = f.read()
+            st = os.stat(real)
+            keep = len(data) <= max_file_size and used + len(data) <= memory_budget
+            if keep:
+                used += len(data)
+            entry = MediaEntry(
+                path=real,
+                data=data if keep else None,
+                etag=hashlib.sha1(data).hexdigest(),
+                last_modified=datetime.fromtimestamp(int(st.st_mtime), tz=timezone.utc),
+                size=len(data),
+                mimetype=mimetypes.guess_type(real)[0] or "application/octet-stream",
+                max_age=max_age,
+            )
+            by_real_path[real] = entry
+        manifest[logical] = entry
+    return manifest
@@ -0,0 +1,237 @@
+"""
+Dérivés d'images (miniatures WebP / AVIF) construits hors ligne.
+
+Pour chaque image du manifeste /media, le builder produit des versions
+redimensionnées par paliers de largeur (WIDTH_BUCKETS, sans jamais agrandir)
+dans les formats modernes disponibles, et écrit un manifest.json :
+
+    {chemin logique: {"source_etag": ..., "width": ..., "variants": [
+        {"width": 320, "mimetype": "image/webp", "file": "<etag>-320.webp", "size": ...}, ...]}}
+
+Un dérivé n'est gardé que s'il est plus léger que l'original. Au démarrage,
+load_derivatives relit ce manifeste (les entrées dont la source a changé sont
+ignorées) et la route /media choisit le plus petit dérivé qui couvre ?w= dans
+un format que le client annonce explicitement dans Accept.
+
+Usage :
+    python -m core.media_derivatives build instance/media_derivatives
+    MEDIA_DERIVATIVES_DIR=instance/media_derivatives gunicorn app:app
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+from functools import lru_cache
+from io import BytesIO
+
+from werkzeug.http import parse_accept_header
+
+from .media import MediaEntry, build_media_manifest
+
+DEFAULT_DERIVATIVES_DIR = os.path.join(os.path.dirname(__file__), "..", "instance", "media_derivatives")
+DERIVATIVES_DIR = os.environ.get("MEDIA_DERIVATIVES_DIR", DEFAULT_DERIVATIVES_DIR)
+WIDTH_BUCKETS = (160, 320, 640)
+MANIFEST_NAME = "manifest.json"
+
+# Format Pillow, extension, type MIME et options d'encodage, par ordre de préférence
+FORMATS = (
+    ("AVIF", "avif", "image/avif", {"quality": 55}),
+    ("WEBP", "webp", "image/webp", {"quality": 80, "method": 6}),
+)
+
+
+def available_formats():
+    """Formats de FORMATS que l'installation de Pillow sait écrire"""
+    from PIL import Image
+
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt[0] in Image.SAVE]
+
+
+def target_widths(source_width, buckets=WIDTH_BUCKETS):
+    """Largeurs à produire : chaque palier, plafonné à la largeur de l'original"""
+    return sorted({min(bucket, source_width) for bucket in buckets})
+
+
+def _encode(image, width, pil_format, options):
+    from PIL import Image
+
+    if width < image.width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# ---------- Builder hors ligne ----------
+
+def build(directory=DERIVATIVES_DIR, buckets=WIDTH_BUCKETS):
+    """Construit les dérivés de toutes les images du manifeste /media dans `directory`"""
+    from PIL import Image
+
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    formats = available_formats()
+    manifest = {}
+    by_etag = {}
+    source_bytes = 0
+    derived_bytes = 0
+    for logical, entry in sorted(build_media_manifest(memory_budget=0).items()):
+        if not entry.mimetype.startswith("image/"):
+            continue
+        record = by_etag.get(entry.etag)
+        if record is None:
+            try:
+                image = Image.open(entry.path)
+                image.load()
+            except OSError as exc:
+                print(f"ignoré {logical} : {exc}", file=sys.stderr)
+                continue
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+            variants = []
+            for width in target_widths(image.width, buckets):
+                for pil_format, ext, mimetype, options in formats:
+                    data = _encode(image, width, pil_format, options)
+                    if len(data) >= entry.size:
+                        continue
+                    name = f"{entry.etag}-{width}.{ext}"
+                    _write_atomic(os.path.join(directory, name), data)
+                    variants.append({"width": width, "mimetype": mimetype, "file": name, "size": len(data)})
+            record = {"source_etag": entry.etag, "width": image.width, "variants": variants}
+            by_etag[entry.etag] = record
+            source_bytes += entry.size
+            derived_bytes += min((v["size"] for v in variants), default=entry.size)
+        manifest[logical] = record
+
+    _write_atomic(os.path.join(directory, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode("utf-8"))
+    print(f"{len(by_etag)} images, {sum(len(r['variants']) for r in by_etag.values())} dérivés, "
+          f"{source_bytes} -> {derived_bytes} octets (plus petit dérivé)", file=sys.stderr)
+    return manifest
+
+
+# ---------- Chargement et choix à l'exécution ----------
+
+class Derivative:
+    """Dérivé chargé en mémoire, avec son MediaEntry (en-têtes HTTP précalculés)"""
+
+    __slots__ = ("width", "mimetype", "entry")
+
+    def __init__(self, width, mimetype, entry):
+        self.width = width
+        self.mimetype = mimetype
+        self.entry = entry
+
+
+def load_derivatives(media_manifest, directory=DERIVATIVES_DIR, max_age=7 * 24 * 3600):
+    """
+    Chemin logique -> (largeur de l'original, [Derivative] triés par largeur).
+    Dictionnaire vide si le builder n'a pas été lancé ; les dérivés d'une image
+    modifiée depuis le build sont ignorés (l'original reste servi).
+    """
+    directory = os.path.abspath(directory)
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    loaded = {}
+    by_file = {}
+    for logical, record in manifest.items():
+        source = media_manifest.get(logical)
+        if source is None or source.etag != record["source_etag"]:
+            continue
+        variants = []
+        for variant in record["variants"]:
+            derivative = by_file.get(variant["file"])
+            if derivative is None:
+                path = os.path.join(directory, variant["file"])
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                entry = MediaEntry(
+                    path=path,
+                    data=data,
+                    etag=hashlib.sha1(data).hexdigest(),
+                    last_modified=datetime.fromtimestamp(int(os.stat(path).st_mtime), tz=timezone.utc),
+                    size=len(data),
+                    mimetype=variant["mimetype"],
+                    max_age=max_age,
+                )
+                derivative = by_file[variant["file"]] = Derivative(variant["width"], variant["mimetype"], entry)
+            variants.append(derivative)
+        if variants:
+            loaded[logical] = (record["width"], sorted(variants, key=lambda d: (d.width, d.entry.size)))
+    return loaded
+
+
+@lru_cache(maxsize=64)
+def accepted_image_types(accept_header):
+    """
+    Types image/* cités explicitement (q > 0) dans l'en-tête Accept.
+    Les jokers (image/*, */*) ne comptent pas : un navigateur qui ne décode
+    pas l'AVIF envoie quand même image/*.
+    """
+    return frozenset(value for value, quality in parse_accept_header(accept_header or "")
+                     if quality > 0 and value.startswith("image/") and not value.endswith("/*"))
+
+
+def select_derivative(derivatives, width, accepted):
+    """
+    Plus petit dérivé acceptable pour une largeur demandée, ou None (servir l'original).
+      - width None : même largeur que l'original, seul le format change
+      - sinon      : plus petit palier >= width, à défaut le plus large disponible
+    À largeur égale, le fichier le plus léger parmi les types acceptés.
+    """
+    if not derivatives:
+        return None
+    source_width, variants = derivatives
+    candidates = [d for d in variants if d.mimetype in accepted]
+    if not candidates:
+        return None
+    if width is None:
+        candidates = [d for d in candidates if d.width == source_width]
+    else:
+        covering = [d for d in candidates if d.width >= width]
+        if covering:
+            candidates = covering
+        else:
+            widest = candidates[-1].width
+            candidates = [d for d in candidates if d.width == widest]
+    if not candidates:
+        return None
+    best_width = min(d.width for d in candidates)
+    return min((d for d in candidates if d.width == best_width), key=lambda d: d.entry.size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dérivés WebP / AVIF des images /media")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="construire les dérivés et le manifeste")
+    p_build.add_argument("directory", nargs="?", default=DERIVATIVES_DIR)
+    p_build.add_argument("--widths", default=",".join(str(w) for w in WIDTH_BUCKETS),
+                         help="paliers de largeur séparés par des virgules")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.directory, tuple(int(w) for w in args.widths.split(",")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Rendu PDF du programme avec WeasyPrint.
+
+Les images du template sont des URLs /media/... servies par l'application
+elle-même : au lieu de laisser WeasyPrint refaire une requête HTTP vers le
+même serveur (bloquant avec un seul worker gunicorn), on les lit directement
+sur le disque, avec un petit cache mémoire.
+
+Le rendu est CPU-bound : PdfRenderService l'exécute dans un pool de processus
+(WeasyPrint préchargé dans chaque processus) derrière une file bornée, pour ne
+pas bloquer les threads qui servent les pages HTML.
+"""
+
+import mimetypes
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from weasyprint import HTML, default_url_fetcher
+
+from .media import build_media_manifest, safe_join_root
+from .media_derivatives import load_derivatives, select_derivative
+from .timing import timings
+
+MEDIA_PREFIX = "/media/"
+# WeasyPrint décode les images avec Pillow : le WebP est toujours disponible
+PDF_IMAGE_TYPES = frozenset({"image/webp"})
+
+
+@lru_cache(maxsize=256)
+def _read_media(real_path):
+    with open(real_path, "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=1)
+def _media_derivatives():
+    # Chargé au premier ?w= rencontré, une fois par processus de rendu
+    return load_derivatives(build_media_manifest(memory_budget=0))
+
+
+def media_url_fetcher(url, timeout=10, ssl_context=None):
+    """url_fetcher WeasyPrint : /media/... (et ses dérivés ?w=) depuis le disque, le reste par défaut"""
+    parts = urlsplit(url)
+    if parts.scheme in ("http", "https") and parts.path.startswith(MEDIA_PREFIX):
+        logical = unquote(parts.path[len(MEDIA_PREFIX):])
+        width = parse_qs(parts.query).get("w", [""])[0]
+        if width.isdigit():
+            derivative = select_derivative(_media_derivatives().get(logical), int(width), PDF_IMAGE_TYPES)
+            if derivative is not None:
+                return {"string": derivative.entry.data, "mime_type": derivative.mimetype, "redirected_url": url}
+        real = safe_join_root(logical)
+        if real is None:
+            raise ValueError(f"media introuvable : {url}")
+        return {
+            "string": _read_media(real),
+            "mime_type": mimetypes.guess_type(real)[0],
+            "redirected_url": url,
+        }
+    return default_url_fetcher(url, timeout=timeout, ssl_context=ssl_context)
+
+
+@timings.timed("weasyprint")
+def render_pdf(html_string, base_url, font_config=None, cache=None):
+    """
+    Rend le HTML du programme en PDF (bytes).
+    font_config (FontConfiguration) et cache (images décodées) peuvent être partagés entre documents.
+    """
+    pdf_buffer = BytesIO()
+    HTML(string=html_string, base_url=base_url, url_fetcher=media_url_fetcher).write_pdf(
+        pdf_buffer, font_config=font_config, cache=cache)
+    return pdf_buffer.getvalue()
+
+
+# ---------- Service de rendu en pool de processus ----------
+
+class PdfQueueFull(Exception):
+    """La file de rendu est pleine : le client doit réessayer plus tard"""
+
+
+class PdfRenderTimeout(Exception):
+    """Le rendu n'a pas fini dans le délai imparti"""
+
+
+def _warm_worker():
+    # Charge WeasyPrint, Pango et les polices une fois par processus
+    HTML(string="<p>MyTrainingPal</p>").write_pdf()
+
+
+class PdfRenderService:
+    """
+    Pool de processus WeasyPrint avec file bornée.
+      - workers     : nombre de processus (0 = rendu dans le thread appelant)
+      - max_pending : rendus en cours + en attente au-delà desquels submit lève PdfQueueFull
+      - timeout     : délai max d'attente d'un rendu (secondes)
+    Le pool est créé au premier rendu, donc après le fork des workers gunicorn.
+    """
+
+    def __init__(self, workers=2, max_pending=8, timeout=60.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+            return self._executor
+
+    def _reset_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, html_string, base_url):
+        """Soumet un rendu et renvoie un Future de bytes, ou lève PdfQueueFull"""
+        if not self._slots.acquire(blocking=False):
+            raise PdfQueueFull()
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(render_pdf, html_string, base_url)
+            except BrokenProcessPool:
+                # Un processus est mort (OOM...) : on repart d'un pool neuf
+                self._reset_executor(executor)
+                future = self._get_executor().submit(render_pdf, html_string, base_url)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def render(self, html_string, base_url):
+        """Rendu bloquant avec délai ; lève PdfQueueFull ou PdfRenderTimeout"""
+        if self.workers <= 0:
+            return render_pdf(html_string, base_url)
+        future = self.submit(html_string, base_url)
+        # Attente côté serveur web (file + rendu) : les mesures faites dans le pool restent dans ses processus
+        with timings.timer("pdf_wait"):
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                # Retire le job s'il attend encore ; s'il tourne déjà, il garde sa place jusqu'à la fin
+                future.cancel()
+                raise PdfRenderTimeout()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pdf_service = PdfRenderService(
+    workers=int(os.environ.get("PDF_WORKERS", 2)),
+    max_pending=int(os.environ.get("PDF_QUEUE_SIZE", 8)),
+    timeout=float(os.environ.get("PDF_RENDER_TIMEOUT", 60)),
+)
@@ -0,0 +1,207 @@
+"""
+Export PDF en masse : un fichier JSONL d'entrées -> une archive zip de PDF.
+
+Entrée : mêmes enregistrements que core.batch (champs de POST /api/program,
+"id" optionnel). Pour chaque ligne, le programme est généré, program_pdf.html
+est rendu avec Jinja (sans Flask) puis converti par WeasyPrint.
+
+Les rendus tournent dans des processus (spawn) préparés une fois :
+  - template Jinja compilé
+  - FontConfiguration WeasyPrint réutilisée par tous les documents
+  - cache d'images WeasyPrint partagé entre les documents du processus (borné
+    par le nombre d'images du catalogue), les images étant lues sur le disque
+    par media_url_fetcher
+Le processus principal ne fait que lire, soumettre et écrire : au plus
+`max_pending` rendus en cours, et les PDF sont écrits dans le zip dans l'ordre
+de l'entrée dès qu'ils sont prêts. La mémoire ne dépend pas de la taille du lot.
+Les entrées identiques (clé canonique de program_cache) ne sont rendues qu'une fois
+tant que leur PDF est en cours ou dans le petit LRU `dedupe_size`.
+
+L'archive contient aussi manifest.jsonl : une ligne par enregistrement, avec le
+nom du PDF ou l'erreur.
+
+Usage :
+    python -m core.pdf_batch clients.jsonl -o programmes.zip --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from .batch import parse_line
+from .pdf import render_pdf
+from .program_cache import ProgramCache, canonical_key, canonical_selection
+from .program_view import build_program_view
+from .prog import create_complete_program
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+# Jamais contacté : media_url_fetcher sert les URLs /media/ depuis le disque
+MEDIA_BASE = "http://mytrainingpal.local/"
+DEFAULT_DEDUPE_SIZE = 32
+
+_worker = {}
+
+
+def _init_worker():
+    """Prépare un processus de rendu : template, polices, cache d'images"""
+    from weasyprint.text.fonts import FontConfiguration
+
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html"]))
+    _worker["template"] = env.get_template("program_pdf.html")
+    _worker["font_config"] = FontConfiguration()
+    _worker["cache"] = {}
+
+
+def render_program_pdf(inputs):
+    """(nb_jours, objectifs, sélection, niveau) -> (split_name, bytes du PDF) ; exécuté dans un worker"""
+    nb_jours, objectifs_muscles, exercices_choisis, level = inputs
+    programme, split_name, sessions_order = create_complete_program(
+        nb_jours, objectifs_muscles, canonical_selection(exercices_choisis), level)
+    view = build_program_view(programme, split_name, sessions_order, nb_jours)
+    html_string = _worker["template"].render(program=view, split_name=split_name, media_base=MEDIA_BASE)
+    return split_name, render_pdf(html_string, MEDIA_BASE, _worker["font_config"], _worker["cache"])
+
+
+def pdf_filename(line_no, record_id, split_name):
+    label = re.sub(r"[^A-Za-z0-9_.-]+", "-", str(record_id)).strip("-.") if record_id is not None else ""
+    return f"{line_no:06d}_{label or 'programme'}_{split_name.replace('/', '-')}.pdf"
+
+
+class _InlineExecutor:
+    """Même interface que ProcessPoolExecutor, rendu dans le processus courant (workers=0)"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def _done_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def export_zip(lines, out, workers=None, max_pending=None, dedupe_size=DEFAULT_DEDUPE_SIZE):
+    """
+    Lit `lines` (JSONL), écrit l'archive zip dans `out` (fichier binaire, seekable ou non).
+    workers=0 : rendu dans le processus courant. Renvoie les compteurs et le débit.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    max_pending = max_pending or max(1, workers) * 2
+    stats = {"records": 0, "rendered": 0, "duplicates": 0, "errors": 0}
+    recent = ProgramCache(maxsize=dedupe_size, ttl=float("inf"))  # clé -> (split_name, pdf)
+    inflight = {}  # clé -> Future en cours
+    pending = deque()  # (line_no, record_id, key, future, erreur), dans l'ordre de l'entrée
+
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker)
+    else:
+        _init_worker()
+        executor = _InlineExecutor()
+
+    t0 = time.perf_counter()
+    # Le manifeste est écrit à la fin de l'archive ; au-delà de 1 Mo il passe sur disque
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as archive, \
+            tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", encoding="utf-8") as manifest:
+
+        def write_oldest():
+            line_no, record_id, key, future, error = pending.popleft()
+            stats["records"] += 1
+            entry = {"line": line_no, "id": record_id}
+            if error is None:
+                try:
+                    split_name, pdf_bytes = future.result()
+                except Exception as exc:
+                    error = f"rendu impossible : {exc}"
+                else:
+                    recent.put(key, (split_name, pdf_bytes))
+                    entry["file"] = pdf_filename(line_no, record_id, split_name)
+                    archive.writestr(entry["file"], pdf_bytes)
+                if inflight.get(key) is future:
+                    del inflight[key]
+            if error is not None:
+                stats["errors"] += 1
+                entry["error"] = error
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        try:
+            for line_no, text in enumerate(lines, 1):
+                if not text.strip():
+                    continue
+                record_id, inputs, error = parse_line(text)
+                key = future = None
+                if error is None:
+                    key = canonical_key(*inputs)
+                    cached = recent.get(key)
+                    if cached is not None:
+                        future = _done_future(cached)
+                    else:
+                        future = inflight.get(key)
+                    if future is not None:
+                        stats["duplicates"] += 1
+                    else:
+                        future = inflight[key] = executor.submit(render_program_pdf, inputs)
+                        stats["rendered"] += 1
+                pending.append((line_no, record_id, key, future, error))
+                while len(pending) > max_pending:
+                    write_oldest()
+            while pending:
+                write_oldest()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        manifest.seek(0)
+        with archive.open("manifest.jsonl", "w") as dest:
+            for line in manifest:
+                dest.write(line.encode("utf-8"))
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = elapsed
+    stats["pdfs_per_sec"] = stats["records"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export PDF en masse (JSONL -> zip)")
+    parser.add_argument("input", help="fichier JSONL, ou - pour l'entrée standard")
+    parser.add_argument("-o", "--output", required=True, help="archive zip de sortie (- : sortie standard)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus WeasyPrint (0 : aucun)")
+    parser.add_argument("--max-pending", type=int, default=None, help="rendus en cours au plus (défaut : 2 x workers)")
+    parser.add_argument("--dedupe-size", type=int, default=DEFAULT_DEDUPE_SIZE, help="PDF récents gardés pour les doublons")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        stats = export_zip(source, out, args.workers, args.max_pending, args.dedupe_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"{stats['records']} enregistrements, {stats['rendered']} PDF rendus, {stats['duplicates']} doublons, "
+          f"{stats['errors']} erreurs en {stats['seconds']:.2f} s ({stats['pdfs_per_sec']:.1f} PDF/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
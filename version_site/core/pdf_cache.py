@@ -0,0 +1,128 @@
+"""
+Cache des PDF rendus, adressé par contenu.
+
+La clé est le SHA-256 du HTML passé à WeasyPrint : deux rendus du même HTML
+donnent le même PDF, on ne relance donc pas la mise en page. La clé sert
+aussi d'ETag pour les téléchargements.
+
+Deux niveaux :
+  - mémoire : LRU de quelques PDF, par worker
+  - disque  : <répertoire>/<2 premiers caractères>/<clé>.pdf, partagé entre
+              workers, borné en taille (les fichiers les moins récemment
+              utilisés sont supprimés en premier)
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "instance", "pdf_cache")
+
+
+def pdf_cache_key(html_string):
+    return hashlib.sha256(html_string.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024, memory_items=32):
+        self.directory = os.path.abspath(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pdf")
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+        if self.directory:
+            self._write_disk(key, data)
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # marque comme récemment utilisé pour l'éviction
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Écriture atomique : un autre worker ne lit jamais un fichier partiel
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._evict_disk()
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"memory_items": len(self._memory), "hits": self.hits, "misses": self.misses,
+                    "directory": self.directory, "max_bytes": self.max_bytes}
+
+
+pdf_cache = PdfCache(
+    directory=os.environ.get("PDF_CACHE_DIR", DEFAULT_CACHE_DIR),
+    max_bytes=int(os.environ.get("PDF_CACHE_MAX_BYTES", 200 * 1024 * 1024)),
+    memory_items=int(os.environ.get("PDF_CACHE_MEMORY_ITEMS", 32)),
+)
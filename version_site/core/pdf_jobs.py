@@ -0,0 +1,159 @@
+"""
+Jobs PDF asynchrones.
+
+Le client crée un job (le HTML du programme est capturé à ce moment-là),
+récupère un identifiant, interroge le statut puis télécharge le fichier quand
+il est prêt, sans garder de connexion ouverte pendant la mise en page.
+
+Les jobs tournent dans le pool de rendu (pdf_service) ou, si celui-ci est
+désactivé (PDF_WORKERS=0), dans un petit pool de threads. Un job non terminé
+`timeout` secondes après sa création passe en échec ; au plus `max_jobs` jobs
+non terminés à la fois (PdfQueueFull au-delà). Les jobs terminés sont oubliés
+après `ttl` secondes. Le store est propre à chaque worker gunicorn : les
+requêtes d'un même job doivent arriver sur le même processus (un seul worker,
+comme dans render.yaml et le Procfile).
+"""
+
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .pdf import PdfQueueFull, PdfRenderTimeout, pdf_service, render_pdf
+from .pdf_cache import pdf_cache, pdf_cache_key
+from .timing import timings
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class PdfJob:
+    def __init__(self, job_id, etag, filename):
+        self.id = job_id
+        self.etag = etag
+        self.filename = filename
+        self.status = QUEUED
+        self.created = time.time()
+        self.finished = None
+        self.error = None
+        self.data = None
+        self.future = None
+
+    def to_dict(self):
+        status = self.status
+        future = self.future
+        if status == QUEUED and future is not None and future.running():
+            status = RUNNING
+        return {
+            "id": self.id,
+            "status": status,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+            "size": len(self.data) if self.data is not None else None,
+        }
+
+
+class PdfJobStore:
+    def __init__(self, ttl=600.0, max_jobs=256, threads=2, timeout=60.0):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.threads = threads
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._thread_pool = None
+
+    def _submit(self, html_string, base_url):
+        if pdf_service.workers > 0:
+            return pdf_service.submit(html_string, base_url)
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="pdf-job")
+        return self._thread_pool.submit(render_pdf, html_string, base_url)
+
+    def create(self, html_string, base_url, filename):
+        """Crée un job ; lève PdfQueueFull si max_jobs jobs tournent déjà ou si le pool de rendu est saturé"""
+        self.expire()
+        etag = pdf_cache_key(html_string)
+        job = PdfJob(secrets.token_urlsafe(12), etag, filename)
+
+        cached = pdf_cache.get(etag)
+        if cached is not None:
+            job.data = cached
+            job.status = DONE
+            job.finished = time.time()
+            with self._lock:
+                self._jobs[job.id] = job
+            return job
+
+        # La place est réservée avant la soumission : des créations simultanées ne dépassent pas max_jobs
+        with self._lock:
+            if sum(j.finished is None for j in self._jobs.values()) >= self.max_jobs:
+                raise PdfQueueFull()
+            self._jobs[job.id] = job
+        try:
+            job.future = self._submit(html_string, base_url)
+        except BaseException:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job
+
+    def _finish(self, job, future):
+        try:
+            data = future.result()
+        except Exception as exc:
+            data, error = None, type(exc).__name__
+        else:
+            # Même arrivé après le délai, le PDF sert aux demandes suivantes
+            pdf_cache.put(job.etag, data)
+            error = None
+        with self._lock:
+            job.future = None
+            if job.finished is not None:
+                return  # déjà en échec pour dépassement du délai
+            job.data = data
+            job.error = error
+            job.status = DONE if error is None else FAILED
+            job.finished = time.time()
+        timings.observe("pdf_job", job.finished - job.created)
+
+    def get(self, job_id):
+        self.expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def expire(self):
+        """
+        Met en échec les jobs non terminés depuis plus de timeout, oublie les jobs
+        terminés depuis plus de ttl, et les plus anciens au-delà de max_jobs
+        """
+        now = time.time()
+        timed_out = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job.finished is None and now - job.created > self.timeout:
+                    job.error = PdfRenderTimeout.__name__
+                    job.status = FAILED
+                    job.finished = now
+                    timed_out.append(job.future)
+            for job_id, job in list(self._jobs.items()):
+                if job.finished is not None and now - job.finished > self.ttl:
+                    del self._jobs[job_id]
+            if len(self._jobs) > self.max_jobs:
+                finished = sorted((j for j in self._jobs.values() if j.finished is not None), key=lambda j: j.finished)
+                for job in finished[:len(self._jobs) - self.max_jobs]:
+                    del self._jobs[job.id]
+        for future in timed_out:
+            # Hors verrou : annuler un rendu en attente appelle _finish. Un rendu déjà lancé va à son terme.
+            if future is not None:
+                future.cancel()
+
+
+pdf_jobs = PdfJobStore(
+    ttl=float(os.environ.get("PDF_JOB_TTL", 600)),
+    max_jobs=int(os.environ.get("PDF_JOB_MAX", 256)),
+    timeout=pdf_service.timeout,
+)
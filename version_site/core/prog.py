@@ -16,10 +16,23 @@ Règles :
 7) Poly avant iso dans l'affichage
 """
 
+import copy
+import os
 from collections import defaultdict
 from typing import Dict, List, Literal, Tuple, Set
 
-from .exercise_database import get_exercise_info, get_exercises_by_muscle
+from .exercise_database import ALL_EXERCISE_NAMES, EXERCISE_RECORDS, get_exercises_by_muscle
+
+# Copie en dict simple des fiches compilées : .get() d'un dict est plus rapide que celui d'un mappingproxy
+_RECORDS = dict(EXERCISE_RECORDS)
+
+# Moteurs de génération : "reference" (generate_workout_program), "array" (core.array_engine, même
+# résultat) ou "exact" (core.exact_engine, allocation optimale, programme différent)
+ENGINES = ("reference", "array", "exact")
+DEFAULT_ENGINE = os.environ.get("PROGRAM_ENGINE", "reference")
+if DEFAULT_ENGINE not in ENGINES:
+    # Erreur au démarrage plutôt qu'à chaque génération
+    raise ValueError(f"PROGRAM_ENGINE inconnu : {DEFAULT_ENGINE} (attendu : {', '.join(ENGINES)})")
 
 Level = Literal["beginner", "advanced"]
 Objectif = Literal["maintenance", "normal_growth", "prioritised_growth"]
@@ -137,6 +150,17 @@ def compute_muscle_targets(objectifs_muscles: Dict[str, Objectif],
 
 # ---------- 2. Construction des pools d'exercices ----------
 
+def _pattern_of(exo_name):
+    record = _RECORDS.get(exo_name)
+    return record.pattern if record is not None else None
+
+
+def _poly_first_key(entry):
+    """Clé de tri des entrées d'une séance : poly avant iso, puis par nom"""
+    record = _RECORDS.get(entry["exercice"])
+    return (0 if record is not None and record.is_poly else 1, entry["exercice"])
+
+
 def build_exercise_pools(exercices_choisis: List[str],
                          objectifs_muscles: Dict[str, Objectif],
                          level: Level):
@@ -153,28 +177,28 @@ def build_exercise_pools(exercices_choisis: List[str],
 
     # Si aucun exercice choisi, charger tous les exercices disponibles pour chaque muscle
     if not exercices_choisis:
-        exercices_choisis = []
+        wanted = set()
         for muscle in objectifs_muscles.keys():
-            exercices_choisis.extend(get_exercises_by_muscle(muscle))
-        # Dédupliquer
-        exercices_choisis = list(set(exercices_choisis))
+            wanted.update(get_exercises_by_muscle(muscle))
+        # Dédupliquer dans l'ordre de la base : le résultat ne dépend ni du hash seed
+        # ni de l'ordre des objectifs
+        exercices_choisis = [name for name in ALL_EXERCISE_NAMES if name in wanted]
 
     # Collecter les exercices
     temp_pools = defaultdict(lambda: {"poly": [], "iso": []})
     
     for exo_name in exercices_choisis:
-        info = get_exercise_info(exo_name)
-        if not info:
+        record = _RECORDS.get(exo_name)
+        if record is None:
             continue
-        exo_type = info.get("type", "polyarticulaire")
-        pattern = info.get("pattern", None)
+        pattern = record.pattern
 
-        if exo_type == "polyarticulaire" and pattern:
+        if record.is_poly and pattern:
             pattern_to_poly_exos[pattern].append(exo_name)
 
         # Utiliser primary_muscles pour éviter le double comptage des volumes
-        for muscle in info.get("primary_muscles", []):
-            if exo_type == "polyarticulaire":
+        for muscle in record.primary_muscles:
+            if record.is_poly:
                 if exo_name not in temp_pools[muscle]["poly"]:
                     temp_pools[muscle]["poly"].append(exo_name)
             else:
@@ -185,10 +209,10 @@ def build_exercise_pools(exercices_choisis: List[str],
     # Pour BEGINNER: favoriser les exercices multi-muscles (plus de primary_muscles = prioritaire)
     # Pour ADVANCED: favoriser les exercices spécifiques (moins de primary_muscles = prioritaire)
     def exercise_specificity(exo_name):
-        info = get_exercise_info(exo_name)
-        if not info:
+        record = _RECORDS.get(exo_name)
+        if record is None:
             return 999 if level == "beginner" else 0
-        num_muscles = len(info.get("primary_muscles", []))
+        num_muscles = len(record.primary_muscles)
         # Beginner: ordre décroissant (plus = mieux), Advanced: ordre croissant (moins = mieux)
         return -num_muscles if level == "beginner" else num_muscles
     
@@ -199,20 +223,14 @@ def build_exercise_pools(exercices_choisis: List[str],
     # Gestion spécifique des épaules : side raise / rear delt si Epaules non en maintenance
     if "Epaules" in objectifs_muscles and objectifs_muscles["Epaules"] != "maintenance":
         shoulder_exos = get_exercises_by_muscle("Epaules")
-        has_side = any(
-            (get_exercise_info(e) or {}).get("pattern") == "Side Raise"
-            for e in pools["Epaules"]["iso"]
-        )
-        has_rear = any(
-            (get_exercise_info(e) or {}).get("pattern") == "Rear Delt"
-            for e in pools["Epaules"]["iso"]
-        )
+        has_side = any(_pattern_of(e) == "Side Raise" for e in pools["Epaules"]["iso"])
+        has_rear = any(_pattern_of(e) == "Rear Delt" for e in pools["Epaules"]["iso"])
 
         for exo_name in shoulder_exos:
-            info = get_exercise_info(exo_name)
-            if not info or info.get("type") != "isolation":
+            record = _RECORDS.get(exo_name)
+            if record is None or record.type != "isolation":
                 continue
-            pattern = info.get("pattern")
+            pattern = record.pattern
             if pattern == "Side Raise" and not has_side:
                 pools["Epaules"]["iso"].append(exo_name)
                 has_side = True
@@ -367,10 +385,9 @@ def allocate_exercises_to_sessions(sessions_names: List[str],
                 session_exo_muscle_demands[session][exo].append(sets_to_place)
                 
                 # Marquer tous les primary muscles de cet exercice comme couverts (poly seulement)
-                info = get_exercise_info(exo)
-                if info and info.get("type") == "polyarticulaire":
-                    for prim_muscle in info.get("primary_muscles", []):
-                        covered_muscles.add(prim_muscle)
+                record = _RECORDS.get(exo)
+                if record is not None and record.is_poly:
+                    covered_muscles.update(record.primary_muscles)
 
     # Convertir en programme: prendre le MAX des demandes pour chaque exercice
     programme_final: Dict[str, List[Dict[str, int]]] = {}
@@ -386,14 +403,7 @@ def allocate_exercises_to_sessions(sessions_names: List[str],
                 )
 
         # Tri poly d'abord, iso ensuite
-        def sort_key(entry):
-            info = get_exercise_info(entry["exercice"])
-            if not info:
-                return (1, entry["exercice"])
-            exo_type = info.get("type", "polyarticulaire")
-            return (0 if exo_type == "polyarticulaire" else 1, entry["exercice"])
-
-        exo_entries.sort(key=sort_key)
+        exo_entries.sort(key=_poly_first_key)
         programme_final[session] = exo_entries
 
     return programme_final
@@ -413,9 +423,9 @@ def enforce_pattern_coverage(programme: Dict[str, List[Dict[str, int]]],
     used_patterns = set()
     for exos in programme.values():
         for entry in exos:
-            info = get_exercise_info(entry["exercice"])
-            if info and info.get("type") == "polyarticulaire" and "pattern" in info:
-                used_patterns.add(info["pattern"])
+            record = _RECORDS.get(entry["exercice"])
+            if record is not None and record.is_poly and record.pattern is not None:
+                used_patterns.add(record.pattern)
 
     available_patterns = set(pattern_to_poly_exos.keys())
     missing_patterns = available_patterns - used_patterns
@@ -430,11 +440,11 @@ def enforce_pattern_coverage(programme: Dict[str, List[Dict[str, int]]],
         if not exo_list:
             continue
         exo_name = exo_list[0]
-        info = get_exercise_info(exo_name)
-        if not info:
+        record = _RECORDS.get(exo_name)
+        if record is None:
             continue
 
-        primary_muscles = info.get("primary_muscles", [])
+        primary_muscles = record.primary_muscles
         target_session = sessions_names[0]
 
         for session in sessions_names:
@@ -454,14 +464,7 @@ def enforce_pattern_coverage(programme: Dict[str, List[Dict[str, int]]],
             session_exos.append({"exercice": exo_name, "series": 1})
 
         # On retrie poly/iso
-        def sort_key(entry):
-            info_e = get_exercise_info(entry["exercice"])
-            if not info_e:
-                return (1, entry["exercice"])
-            exo_type = info_e.get("type", "polyarticulaire")
-            return (0 if exo_type == "polyarticulaire" else 1, entry["exercice"])
-
-        session_exos.sort(key=sort_key)
+        session_exos.sort(key=_poly_first_key)
 
     return programme
 
@@ -495,23 +498,36 @@ def generate_workout_program(nb_jours: int,
     # 5. Rotation pour varier les exercices entre sessions
     rotation_index = {muscle: {vtype: 0 for vtype in ["poly", "iso"]} for muscle in objectifs_muscles.keys()}
     
-    # 6. Tracker: quels exercices sont utilisés dans chaque session
-    # Un exercice peut maintenant apparaître dans PLUSIEURS sessions
-    exercise_in_session: Dict[str, Set[str]] = {}  # {exercice_name: {session_names}}
+    # 6. Trackers incrémentaux (mis à jour à chaque ajout, jamais recalculés)
+    # Un exercice peut apparaître dans PLUSIEURS sessions
+    # Entrées du programme par session, indexées par nom : {session_name: {exercice_name: entry}}
+    session_entries: Dict[str, Dict[str, Dict[str, any]]] = {s: {} for s in sessions_names}
+    # Nombre de sessions de la semaine où figure chaque exercice
+    weekly_appearances: Dict[str, int] = defaultdict(int)
     # Tracker des propriétaires par session : {session_name: {exercice_name: muscle_owner}}
     exercise_owner_per_session: Dict[str, Dict[str, str]] = {s: {} for s in sessions_names}
     # Bénéficiaires par exercice et par session
     exercise_benefits_per_session: Dict[str, Dict[str, Set[str]]] = {s: {} for s in sessions_names}
+    # Séries poly / iso comptées pour chaque muscle (exos dont il est propriétaire ou bénéficiaire)
+    muscle_type_sets: Dict[str, Dict[str, int]] = {muscle: {"poly": 0, "iso": 0} for muscle in objectifs_muscles.keys()}
+    # Patterns des exercices dont chaque muscle est propriétaire (toutes sessions confondues)
+    owned_patterns: Dict[str, Set[str]] = {muscle: set() for muscle in objectifs_muscles.keys()}
+
+    def exo_vol_type(exo_name):
+        record = _RECORDS.get(exo_name)
+        return "poly" if record is not None and record.is_poly else "iso"
     
     # 7. Allouer les exercices session par session en mode round-robin
     session_idx = 0
     max_iterations = 1000
     iteration = 0
+    max_appearances = 2 if nb_jours >= 3 else nb_jours
     
     while any(muscle_counters[m] < muscle_targets[m]["total"] for m in objectifs_muscles.keys()) and iteration < max_iterations:
         iteration += 1
         session_name = sessions_names[session_idx % nb_jours]
         muscles_in_session = split.sessions[session_name]
+        entries_in_session = session_entries[session_name]
         
         # Trouver un muscle qui a besoin de volume dans cette session
         muscle_added = False
@@ -525,25 +541,9 @@ def generate_workout_program(nb_jours: int,
             if abs(current - target) <= 1 or current >= target:
                 continue
             
-            # Déterminer quel type d'exercice on veut ajouter (poly/iso)
-            global_poly = 0
-            global_iso = 0
-            for sess in sessions_names:
-                for exo_entry in programme[sess]:
-                    exo_name = exo_entry["exercice"]
-                    # Vérifier si cet exercice dans cette session appartient à ce muscle
-                    is_owner = exo_name in exercise_owner_per_session[sess] and exercise_owner_per_session[sess][exo_name] == muscle
-                    is_beneficiary = exo_name in exercise_benefits_per_session[sess] and muscle in exercise_benefits_per_session[sess][exo_name]
-                    
-                    if is_owner or is_beneficiary:
-                        exo_info = get_exercise_info(exo_name)
-                        if exo_info:
-                            if exo_info.get("type") == "polyarticulaire":
-                                global_poly += exo_entry["series"]
-                            else:
-                                global_iso += exo_entry["series"]
-            
             # Déterminer quel type d'exercice ajouter
+            global_poly = muscle_type_sets[muscle]["poly"]
+            global_iso = muscle_type_sets[muscle]["iso"]
             vol_type = None
             if global_poly < muscle_targets[muscle]["poly"]:
                 vol_type = "poly"
@@ -555,15 +555,14 @@ def generate_workout_program(nb_jours: int,
             
             # Maintenant chercher dans cette session si un exercice du bon type existe pour ce muscle
             existing_in_session = None
-            for exo_entry in programme[session_name]:
-                existing_exo_name = exo_entry["exercice"]
-                existing_info = get_exercise_info(existing_exo_name)
-                if existing_info:
-                    existing_primary = existing_info.get("primary_muscles", [])
-                    existing_type = existing_info.get("type", "")
+            for existing_exo_name in entries_in_session:
+                existing_record = _RECORDS.get(existing_exo_name)
+                if existing_record is not None:
+                    existing_primary = existing_record.primary_muscles
+                    existing_type = existing_record.type
                     
                     # Vérifier si cet exercice cible notre muscle ET est du bon type
-                    if muscle in existing_primary:
+                    if muscle in existing_record.primary_set:
                         if (vol_type == "poly" and existing_type == "polyarticulaire") or \
                            (vol_type == "iso" and existing_type == "isolation"):
                             # Vérifier que l'ajout de séries ne ferait pas dépasser les bénéficiaires
@@ -582,33 +581,34 @@ def generate_workout_program(nb_jours: int,
             # Si on a trouvé un exercice du bon type pour ce muscle, augmenter ses séries
             # MAIS limiter à 4 séries max par exercice dans une session
             if existing_in_session:
-                current_series = 0
-                for exo_entry in programme[session_name]:
-                    if exo_entry["exercice"] == existing_in_session:
-                        current_series = exo_entry["series"]
-                        # Limiter à 4 séries max par exercice dans une session
-                        if current_series < 4:
-                            exo_entry["series"] += 2
-                            
-                            # Incrémenter les compteurs
-                            muscle_counters[muscle] += 2
-                            
-                            # Si cet exercice a des bénéficiaires dans cette session, les incrémenter aussi
-                            if existing_in_session in exercise_benefits_per_session[session_name]:
-                                for beneficiary in list(exercise_benefits_per_session[session_name][existing_in_session]):
-                                    if beneficiary in muscle_counters:
-                                        # Vérifier si le bénéficiaire a encore besoin de volume
-                                        if muscle_counters[beneficiary] < muscle_targets[beneficiary]["total"]:
-                                            muscle_counters[beneficiary] += 2
-                                        # Retirer ce muscle des bénéficiaires s'il a atteint son target
-                                        if muscle_counters[beneficiary] >= muscle_targets[beneficiary]["total"]:
-                                            exercise_benefits_per_session[session_name][existing_in_session].remove(beneficiary)
-                            
-                            muscle_added = True
-                        # Si déjà à 4 séries, ne pas augmenter (on ajoutera un nouvel exercice)
-                        break
-                
-                if muscle_added:
+                exo_entry = entries_in_session[existing_in_session]
+                # Limiter à 4 séries max par exercice dans une session
+                # Si déjà à 4 séries, ne pas augmenter (on ajoutera un nouvel exercice)
+                if exo_entry["series"] < 4:
+                    exo_entry["series"] += 2
+                    existing_type = exo_vol_type(existing_in_session)
+                    
+                    # Incrémenter les compteurs
+                    muscle_counters[muscle] += 2
+                    owner = exercise_owner_per_session[session_name][existing_in_session]
+                    muscle_type_sets[owner][existing_type] += 2
+                    
+                    # Si cet exercice a des bénéficiaires dans cette session, les incrémenter aussi
+                    if existing_in_session in exercise_benefits_per_session[session_name]:
+                        beneficiaries = exercise_benefits_per_session[session_name][existing_in_session]
+                        for beneficiary in list(beneficiaries):
+                            muscle_type_sets[beneficiary][existing_type] += 2
+                            if beneficiary in muscle_counters:
+                                # Vérifier si le bénéficiaire a encore besoin de volume
+                                if muscle_counters[beneficiary] < muscle_targets[beneficiary]["total"]:
+                                    muscle_counters[beneficiary] += 2
+                                # Retirer ce muscle des bénéficiaires s'il a atteint son target
+                                if muscle_counters[beneficiary] >= muscle_targets[beneficiary]["total"]:
+                                    beneficiaries.remove(beneficiary)
+                                    # Ses séries sur cet exercice ne lui sont plus comptées
+                                    muscle_type_sets[beneficiary][existing_type] -= exo_entry["series"]
+                    
+                    muscle_added = True
                     break
             
             # Pas d'exercice du bon type trouvé, continuer pour en choisir un nouveau
@@ -627,23 +627,16 @@ def generate_workout_program(nb_jours: int,
             
             # Pour les muscles avec plusieurs patterns (ex: Dorsaux),
             # favoriser un pattern différent de ceux déjà utilisés GLOBALEMENT
-            used_patterns = set()
-            for sess in sessions_names:
-                if sess in exercise_owner_per_session:
-                    for exo_name_temp, owner in exercise_owner_per_session[sess].items():
-                        if owner == muscle:
-                            info_temp = get_exercise_info(exo_name_temp)
-                            if info_temp and info_temp.get("pattern"):
-                                used_patterns.add(info_temp.get("pattern"))
+            used_patterns = owned_patterns[muscle]
             
             # Trier les candidats : patterns non utilisés en premier
             candidates_new_pattern = []
             candidates_used_pattern = []
             
             for candidate in candidates:
-                info_cand = get_exercise_info(candidate)
-                if info_cand:
-                    cand_pattern = info_cand.get("pattern")
+                record_cand = _RECORDS.get(candidate)
+                if record_cand is not None:
+                    cand_pattern = record_cand.pattern
                     if cand_pattern and cand_pattern not in used_patterns:
                         candidates_new_pattern.append(candidate)
                     else:
@@ -664,23 +657,19 @@ def generate_workout_program(nb_jours: int,
                 rotation_index[muscle][vol_type] += 1
                 
                 # Vérifier si cet exercice est déjà dans CETTE session
-                already_in_this_session = any(e["exercice"] == candidate for e in programme[session_name])
-                if already_in_this_session:
+                if candidate in entries_in_session:
                     continue
                 
-                # Compter combien de fois cet exercice apparaît déjà dans la semaine
-                times_in_week = sum(1 for sess in sessions_names if any(e["exercice"] == candidate for e in programme[sess]))
                 # Limiter à 2 apparitions par semaine (sauf si on manque vraiment d'exercices)
-                max_appearances = 2 if nb_jours >= 3 else nb_jours
-                if times_in_week >= max_appearances and attempt < len(candidates_sorted) - 1:
+                if weekly_appearances[candidate] >= max_appearances and attempt < len(candidates_sorted) - 1:
                     continue
                 
                 # Vérifier les muscles ciblés par cet exercice
-                candidate_info = get_exercise_info(candidate)
-                if not candidate_info:
+                candidate_record = _RECORDS.get(candidate)
+                if candidate_record is None:
                     continue
                 
-                candidate_muscles = candidate_info.get("primary_muscles", [])
+                candidate_muscles = candidate_record.primary_muscles
                 
                 # Vérifier si ajouter cet exercice ferait dépasser un muscle bénéficiaire
                 would_overflow = False
@@ -699,10 +688,8 @@ def generate_workout_program(nb_jours: int,
             # Si aucun exercice trouvé sans débordement, prendre le premier disponible qui n'est pas déjà dans cette session
             if not exo_name:
                 for candidate in candidates_sorted:
-                    already_in_this_session = any(e["exercice"] == candidate for e in programme[session_name])
-                    if not already_in_this_session:
-                        candidate_info = get_exercise_info(candidate)
-                        if candidate_info:
+                    if candidate not in entries_in_session:
+                        if candidate in _RECORDS:
                             exo_name = candidate
                             break
             
@@ -711,19 +698,16 @@ def generate_workout_program(nb_jours: int,
                 continue
             
             # Récupérer les infos de l'exercice pour savoir quels muscles il cible
-            exo_info = get_exercise_info(exo_name)
-            if not exo_info:
+            exo_record = _RECORDS.get(exo_name)
+            if exo_record is None:
                 continue
             
-            primary_muscles = exo_info.get("primary_muscles", [])
+            primary_muscles = exo_record.primary_muscles
             
             # Assigner ce muscle comme propriétaire de l'exercice DANS CETTE SESSION
             exercise_owner_per_session[session_name][exo_name] = muscle
-            
-            # Tracker cet exercice dans cette session
-            if exo_name not in exercise_in_session:
-                exercise_in_session[exo_name] = set()
-            exercise_in_session[exo_name].add(session_name)
+            if exo_record.pattern:
+                owned_patterns[muscle].add(exo_record.pattern)
             
             # Les autres muscles ciblés deviennent bénéficiaires (si besoin de volume ET ne dépassent pas)
             exercise_benefits_per_session[session_name][exo_name] = set()
@@ -747,14 +731,20 @@ def generate_workout_program(nb_jours: int,
                 initial_series = 3  # Par défaut (préférer 3 séries plutôt que 2)
             
             # Ajouter l'exercice dans la session
-            programme[session_name].append({"exercice": exo_name, "series": initial_series})
+            entry = {"exercice": exo_name, "series": initial_series}
+            programme[session_name].append(entry)
+            entries_in_session[exo_name] = entry
+            weekly_appearances[exo_name] += 1
             
             # Mettre à jour le compteur du muscle propriétaire
+            new_type = exo_vol_type(exo_name)
             muscle_counters[muscle] += initial_series
+            muscle_type_sets[muscle][new_type] += initial_series
             
             # ET AUSSI les compteurs des muscles bénéficiaires
             for beneficiary in exercise_benefits_per_session[session_name][exo_name]:
                 muscle_counters[beneficiary] += initial_series
+                muscle_type_sets[beneficiary][new_type] += initial_series
             
             muscle_added = True
             break
@@ -784,14 +774,7 @@ def generate_workout_program(nb_jours: int,
         ]
         
         # Trier poly avant iso
-        def sort_key(entry):
-            info = get_exercise_info(entry["exercice"])
-            if not info:
-                return (1, entry["exercice"])
-            exo_type = info.get("type", "polyarticulaire")
-            return (0 if exo_type == "polyarticulaire" else 1, entry["exercice"])
-        
-        programme[session].sort(key=sort_key)
+        programme[session].sort(key=_poly_first_key)
     
     return programme
 
@@ -799,14 +782,85 @@ def generate_workout_program(nb_jours: int,
 def create_complete_program(nb_jours: int,
                             objectifs_muscles: Dict[str, Objectif],
                             exercices_choisis: List[str],
-                            level: Level = "advanced"):
+                            level: Level = "advanced",
+                            engine: str = None):
     """
     Wrapper pour le front :
       - programme détaillé
       - nom du split ("Full Body", "Upper/Lower", "Push/Pull/Legs")
       - ordre des sessions à afficher
+    Sans sélection d'exercices, le programme est lu dans la table précalculée
+    (PROGRAM_TABLE_PATH) si elle est configurée, sinon généré.
+    `engine` choisit le moteur de génération (ENGINES, défaut : PROGRAM_ENGINE) ;
+    "reference" et "array" donnent le même programme, "exact" ne lit pas la table
+    (elle contient les programmes du moteur glouton).
     """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"moteur inconnu : {engine} (attendu : {', '.join(ENGINES)})")
     split = create_prog(nb_jours)
-    programme = generate_workout_program(nb_jours, objectifs_muscles, exercices_choisis, level)
     sessions_order = list(split.sessions.keys())[:nb_jours]
+    programme = None
+    if not exercices_choisis and engine != "exact":
+        from .program_table import get_default_table
+        table = get_default_table()
+        if table is not None:
+            programme = table.lookup(nb_jours, objectifs_muscles, level)
+    if programme is None:
+        if engine == "array":
+            from .array_engine import generate_workout_program_array
+            programme = generate_workout_program_array(nb_jours, objectifs_muscles, exercices_choisis, level)
+        elif engine == "exact":
+            from .exact_engine import generate_workout_program_exact
+            programme = generate_workout_program_exact(nb_jours, objectifs_muscles, exercices_choisis, level)
+        else:
+            programme = generate_workout_program(nb_jours, objectifs_muscles, exercices_choisis, level)
     return programme, split.name, sessions_order
+
+
+def create_complete_program_many(requests,
+                                 engine: str = None,
+                                 with_session_targets: bool = False):
+    """
+    create_complete_program pour un lot de demandes (nb_jours, objectifs, sélection, niveau).
+    Renvoie la liste des résultats, dans l'ordre des demandes. Comme program_cache et
+    core.batch, chaque programme est généré depuis la sélection canonique : les demandes
+    identiques à l'ordre de la sélection près ne sont générées qu'une fois, puis copiées,
+    et le résultat ne dépend pas de leur place dans le lot.
+    with_session_targets=True ajoute à chaque résultat le plan par séance
+    ({séance: {muscle: {"poly", "iso"}}}, comme distribute_muscle_volume_over_sessions),
+    lu dans les répartitions mémorisées de core.volume_batch.
+    C'est le chemin de génération de core.batch (un appel par paquet d'entrées).
+    """
+    from .program_cache import canonical_key, canonical_selection
+    from .volume_batch import GOAL_MUSCLES, session_targets_many
+
+    requests = list(requests)
+    generated = {}
+    results = []
+    for nb_jours, objectifs_muscles, exercices_choisis, level in requests:
+        key = canonical_key(nb_jours, objectifs_muscles, exercices_choisis, level)
+        if key in generated:
+            results.append(copy.deepcopy(generated[key]))
+        else:
+            generated[key] = create_complete_program(
+                nb_jours, objectifs_muscles, canonical_selection(exercices_choisis), level, engine)
+            results.append(generated[key])
+
+    if not with_session_targets:
+        return results
+
+    plans = [None] * len(requests)
+    by_days = defaultdict(list)
+    for idx, (nb_jours, objectifs_muscles, _, level) in enumerate(requests):
+        if all(muscle in GOAL_MUSCLES for muscle in objectifs_muscles):
+            by_days[nb_jours].append(idx)
+        else:
+            # Muscle hors MUSCLE_INFO : pas de répartition mémorisée
+            targets = compute_muscle_targets(objectifs_muscles, level)
+            plans[idx] = distribute_muscle_volume_over_sessions(create_prog(nb_jours), nb_jours, targets)[1]
+    for nb_jours, indexes in by_days.items():
+        batch = session_targets_many(nb_jours, [requests[i][1] for i in indexes], [requests[i][3] for i in indexes])
+        for idx, plan in zip(indexes, batch):
+            plans[idx] = plan
+    return [result + (plan,) for result, plan in zip(results, plans)]
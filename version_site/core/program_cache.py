@@ -0,0 +1,130 @@
+"""
+Cache mémoire des programmes générés.
+
+create_complete_program est déterministe pour un tuple (jours, objectifs,
+sélection, niveau) : on garde les derniers résultats dans un LRU borné avec
+expiration (TTL), partagé entre les threads d'un même worker gunicorn.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .encoding import EncodingError, goals_to_code, selection_to_mask
+from .exercise_database import EXERCISE_IDS
+from .prog import create_complete_program
+from .timing import timings
+
+
+def canonical_selection(exercices_choisis):
+    """
+    Forme canonique d'une sélection : l'ordre ne compte pas, les doublons non plus.
+    Les exercices connus sont rangés dans l'ordre de la base, les inconnus à la fin
+    (ils sont ignorés par le générateur mais changent le cas "sélection vide").
+    """
+    unique = set(exercices_choisis or ())
+    known = sorted((n for n in unique if n in EXERCISE_IDS), key=EXERCISE_IDS.__getitem__)
+    unknown = sorted(n for n in unique if n not in EXERCISE_IDS)
+    return known + unknown
+
+
+def canonical_key(nb_jours, objectifs_muscles, exercices_choisis, level):
+    """
+    Clé stable des entrées : (jours, niveau, code des objectifs, masque de la sélection).
+    Si un exercice ou un objectif est inconnu de la base, hash de la forme JSON canonique.
+    """
+    try:
+        return (int(nb_jours), level, goals_to_code(objectifs_muscles or {}), selection_to_mask(exercices_choisis or ()))
+    except EncodingError:
+        pass
+    payload = json.dumps(
+        [int(nb_jours), sorted((objectifs_muscles or {}).items()), canonical_selection(exercices_choisis), level],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ProgramCache:
+    """LRU borné + TTL, thread-safe, avec compteurs hits / misses / evictions"""
+
+    def __init__(self, maxsize=256, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            # Calcul hors verrou : deux threads peuvent calculer la même clé, le résultat est identique
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+program_cache = ProgramCache(
+    maxsize=int(os.environ.get("PROGRAM_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("PROGRAM_CACHE_TTL", 3600)),
+)
+
+
+def cached_create_complete_program(nb_jours, objectifs_muscles, exercices_choisis, level="advanced"):
+    """
+    Même contrat que create_complete_program, mais mémorisé dans program_cache.
+    La sélection est canonicalisée avant génération pour que deux sélections
+    égales en tant qu'ensembles donnent le même programme.
+    On renvoie une copie : les appelants peuvent modifier le résultat sans polluer le cache.
+    """
+    key = canonical_key(nb_jours, objectifs_muscles, exercices_choisis, level)
+    selection = canonical_selection(exercices_choisis)
+
+    def compute():
+        with timings.timer("generate"):
+            return create_complete_program(nb_jours, dict(objectifs_muscles or {}), selection, level)
+
+    result = program_cache.get_or_compute(key, compute)
+    return copy.deepcopy(result)
@@ -0,0 +1,271 @@
+"""
+Table précalculée des programmes "sans sélection".
+
+Quand aucun exercice n'est choisi, le programme ne dépend que de :
+  - nb_jours (2..6)            -> 5 valeurs
+  - level (beginner/advanced)  -> 2 valeurs
+  - objectif de chaque muscle de MUSCLE_INFO (non défini / maintenance /
+    normal_growth / prioritised_growth) -> 2 bits par muscle
+Ces entrées sont packées dans un entier qui sert de clé à une table SQLite
+(lue via mmap), remplie hors ligne par le builder ou à la demande.
+
+Chaque version de la base et de l'algorithme a sa propre table
+(programs_<empreinte>) dans le fichier : des workers de versions différentes
+partagent le fichier sans s'effacer, et seul le builder supprime les tables
+des autres versions.
+
+Valeur stockée : pour chaque séance (dans l'ordre du split), le nombre
+d'exercices puis des paires (id exercice, séries) en uint16.
+
+Usage :
+    PROGRAM_TABLE_PATH=instance/program_table.sqlite gunicorn app:app
+    python -m core.program_table build instance/program_table.sqlite --stop 100000 --workers 4
+    python -m core.program_table stats instance/program_table.sqlite
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from . import prog
+from .encoding import GOAL_MUSCLES, EncodingError, code_to_goals, goals_to_code
+from .exercise_database import ALL_EXERCISE_NAMES, EXERCISE_DATABASE, EXERCISE_IDS, MUSCLE_INFO
+
+TABLE_MUSCLES = GOAL_MUSCLES
+LEVEL_CODES = {"beginner": 0, "advanced": 1}
+MIN_DAYS, MAX_DAYS = 2, 6
+NB_DAYS_VALUES = MAX_DAYS - MIN_DAYS + 1
+TABLE_SIZE = (4 ** len(TABLE_MUSCLES)) * len(LEVEL_CODES) * NB_DAYS_VALUES
+
+_LEVEL_NAMES = {code: level for level, code in LEVEL_CODES.items()}
+
+
+# ---------- Encodage des entrées ----------
+
+def encode_inputs(nb_jours, objectifs_muscles, level):
+    """Entier unique pour (jours, objectifs, niveau), ou None si hors de l'espace tabulé"""
+    if nb_jours not in range(MIN_DAYS, MAX_DAYS + 1) or level not in LEVEL_CODES:
+        return None
+    try:
+        goals_code = goals_to_code(objectifs_muscles)
+    except EncodingError:
+        return None
+    return (goals_code * len(LEVEL_CODES) + LEVEL_CODES[level]) * NB_DAYS_VALUES + (nb_jours - MIN_DAYS)
+
+
+def decode_inputs(key):
+    """Inverse de encode_inputs : (nb_jours, objectifs_muscles, level)"""
+    rest, days_code = divmod(key, NB_DAYS_VALUES)
+    goals_code, level_code = divmod(rest, len(LEVEL_CODES))
+    return days_code + MIN_DAYS, code_to_goals(goals_code), _LEVEL_NAMES[level_code]
+
+
+# ---------- Encodage des programmes ----------
+
+def pack_programme(programme, sessions_order):
+    """Sérialise programme_by_session en blob compact (uint16)"""
+    values = array("H")
+    for session in sessions_order:
+        entries = programme.get(session, [])
+        values.append(len(entries))
+        for entry in entries:
+            values.append(EXERCISE_IDS[entry["exercice"]])
+            values.append(entry["series"])
+    return values.tobytes()
+
+
+def unpack_programme(blob, sessions_order):
+    values = array("H")
+    values.frombytes(blob)
+    programme = {}
+    pos = 0
+    for session in sessions_order:
+        count = values[pos]
+        pos += 1
+        programme[session] = [
+            {"exercice": ALL_EXERCISE_NAMES[values[pos + 2 * i]], "series": values[pos + 2 * i + 1]}
+            for i in range(count)
+        ]
+        pos += 2 * count
+    return programme
+
+
+def _sessions_order(nb_jours):
+    return list(prog.create_prog(nb_jours).sessions.keys())[:nb_jours]
+
+
+def table_fingerprint():
+    """Empreinte de la base et de l'algorithme : une table d'une autre version est ignorée"""
+    h = hashlib.sha1()
+    h.update(json.dumps([EXERCISE_DATABASE, MUSCLE_INFO, prog.VOLUME_OBJECTIFS], sort_keys=True).encode("utf-8"))
+    h.update(inspect.getsource(prog).encode("utf-8"))
+    return h.hexdigest()
+
+
+def generate_entry(key):
+    """Génère le programme d'une clé et renvoie (key, blob)"""
+    nb_jours, objectifs, level = decode_inputs(key)
+    programme = prog.generate_workout_program(nb_jours, objectifs, [], level)
+    return key, pack_programme(programme, _sessions_order(nb_jours))
+
+
+# ---------- Table sur disque ----------
+
+def table_name(fingerprint=None):
+    """Nom de la table SQLite d'une version (version courante par défaut)"""
+    return f"programs_{(fingerprint or table_fingerprint())[:16]}"
+
+
+class ProgramTable:
+    """Table clé entière -> programme packé, stockée dans un fichier SQLite lu en mmap"""
+
+    def __init__(self, path, fill_on_miss=True):
+        self.path = path
+        self.fill_on_miss = fill_on_miss
+        self.table = table_name()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def stale_tables(self):
+        """Tables laissées par d'autres versions (et l'ancien schéma programs/meta)"""
+        names = [row[0] for row in self._connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return [name for name in names
+                if name != self.table and (name in ("programs", "meta") or name.startswith("programs_"))]
+
+    def drop_stale(self):
+        """Supprime les tables des autres versions (builder uniquement, jamais au service)"""
+        stale = self.stale_tables()
+        conn = self._connection()
+        with conn:
+            for name in stale:
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+        return stale
+
+    def get(self, key, sessions_order):
+        row = self._connection().execute(f"SELECT data FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return unpack_programme(row[0], sessions_order)
+
+    def put_many(self, rows):
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR IGNORE INTO {self.table} (key, data) VALUES (?, ?)", rows)
+        except sqlite3.OperationalError:
+            # Base verrouillée par un autre worker : le remplissage est opportuniste
+            pass
+
+    def lookup(self, nb_jours, objectifs_muscles, level):
+        """Programme tabulé, généré et stocké à la volée si absent. None si hors espace."""
+        key = encode_inputs(nb_jours, objectifs_muscles, level)
+        if key is None:
+            return None
+        sessions_order = _sessions_order(nb_jours)
+        programme = self.get(key, sessions_order)
+        if programme is not None:
+            self.hits += 1
+            return programme
+        self.misses += 1
+        if not self.fill_on_miss:
+            return None
+        _, blob = generate_entry(key)
+        self.put_many([(key, blob)])
+        return unpack_programme(blob, sessions_order)
+
+    def count(self):
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+_default_table = None
+_default_table_lock = threading.Lock()
+
+
+def get_default_table():
+    """Table configurée par PROGRAM_TABLE_PATH (None si la variable n'est pas définie)"""
+    global _default_table
+    path = os.environ.get("PROGRAM_TABLE_PATH")
+    if not path:
+        return None
+    with _default_table_lock:
+        if _default_table is None or _default_table.path != path:
+            _default_table = ProgramTable(path, fill_on_miss=os.environ.get("PROGRAM_TABLE_FILL", "1") != "0")
+        return _default_table
+
+
+# ---------- Builder hors ligne ----------
+
+def build(path, start=0, stop=None, workers=1, batch_size=2000):
+    """
+    Remplit les clés [start, stop) manquantes, en parallèle sur `workers` processus,
+    après avoir supprimé les tables des autres versions.
+    """
+    stop = TABLE_SIZE if stop is None else min(stop, TABLE_SIZE)
+    table = ProgramTable(path)
+    for name in table.drop_stale():
+        print(f"{name}: table d'une autre version supprimée", file=sys.stderr)
+    conn = table._connection()
+    done = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            present = {row[0] for row in conn.execute(
+                f"SELECT key FROM {table.table} WHERE key >= ? AND key < ?", (batch_start, batch_stop))}
+            missing = [k for k in range(batch_start, batch_stop) if k not in present]
+            rows = list(pool.map(generate_entry, missing, chunksize=max(1, len(missing) // (workers * 4) or 1)))
+            table.put_many(rows)
+            done += len(rows)
+            elapsed = time.perf_counter() - t0
+            print(f"{batch_stop - start}/{stop - start} keys, {done} generated, {done / elapsed:.0f} programs/s",
+                  file=sys.stderr)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Table précalculée des programmes sans sélection")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="remplir la table hors ligne")
+    p_build.add_argument("path")
+    p_build.add_argument("--start", type=int, default=0)
+    p_build.add_argument("--stop", type=int, default=None, help=f"clé de fin exclue (max {TABLE_SIZE})")
+    p_build.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_stats = sub.add_parser("stats", help="afficher le remplissage")
+    p_stats.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.path, args.start, args.stop, args.workers)
+    table = ProgramTable(args.path)
+    count = table.count()
+    size = sum(os.path.getsize(p) for p in (args.path, args.path + "-wal") if os.path.exists(p))
+    print(f"{args.path}: {count}/{TABLE_SIZE} programmes ({100.0 * count / TABLE_SIZE:.3f}%), {size} octets")
+    stale = table.stale_tables()
+    if stale:
+        print(f"tables d'autres versions (supprimées au prochain build) : {', '.join(stale)}")
+
+
+if __name__ == "__main__":
+    main()
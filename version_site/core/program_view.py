@@ -0,0 +1,103 @@
+"""
+Modèle d'affichage d'un programme généré (page, PDF, API).
+
+create_complete_program renvoie les séances du split ; les vues affichent des
+jours numérotés : les séances sont réparties en tourniquet sur les jours, et
+chaque exercice est complété par l'URL de sa vignette.
+
+ProgramView est immuable (tuples) : elle est mémorisée telle quelle dans
+program_view_cache, avec la même clé canonique que program_cache, et partagée
+entre les requêtes sans copie.
+"""
+
+import os
+from types import MappingProxyType
+from urllib.parse import quote
+
+from .exercise_database import EXERCISE_DATABASE
+from .program_cache import ProgramCache, canonical_key, cached_create_complete_program
+from .timing import timings
+
+THUMB_WIDTH = 320
+# Caractères laissés tels quels par le convertisseur <path:> de werkzeug
+_PATH_SAFE = "!$&'()*+,/:;=@"
+
+
+def media_thumb_url(image_path):
+    """Chemin logique -> URL de la vignette, relative à la racine du site (même encodage que url_for)"""
+    return f"media/{quote(image_path, safe=_PATH_SAFE)}?w={THUMB_WIDTH}"
+
+
+# Table nom -> URL de vignette (None sans image), construite une fois à l'import
+EXERCISE_MEDIA = MappingProxyType({
+    name: media_thumb_url(info["image_path"]) if info.get("image_path") else None
+    for name, info in EXERCISE_DATABASE.items()
+})
+
+
+class ProgramView:
+    """
+    Programme prêt à afficher :
+      - days       : ((jour, ((nom, URL de vignette, séries), ...)), ...)
+      - split_name : "Full Body", "Upper/Lower"...
+    Les URLs sont relatives à la racine du site : le template ajoute le préfixe
+    (racine de l'application, ou URL absolue pour le PDF).
+    Se parcourt comme l'ancien dict {jour: exercices} (items(), len()).
+    """
+
+    __slots__ = ("days", "split_name")
+
+    def __init__(self, days, split_name):
+        self.days = days
+        self.split_name = split_name
+
+    def items(self):
+        return self.days
+
+    def __len__(self):
+        return len(self.days)
+
+
+def _exercise_name_and_series(item):
+    # Les programmes générés et la table précalculée donnent des dicts ; tuples et chaînes par compatibilité
+    if type(item) is dict:
+        return item.get("exercice"), item.get("series")
+    if isinstance(item, tuple):
+        return item[0], ""
+    return str(item), ""
+
+
+def build_program_view(programme_by_session, split_name, sessions_order, nb_jours):
+    """Sortie de create_complete_program -> ProgramView sur les jours 1..nb_jours"""
+    days = []
+    for day in range(1, nb_jours + 1):
+        session_name = sessions_order[(day - 1) % len(sessions_order)] if sessions_order else None
+        exs = []
+        if session_name and session_name in programme_by_session:
+            seen = set()
+            for item in programme_by_session[session_name]:
+                name, series = _exercise_name_and_series(item)
+                if name in seen:
+                    continue
+                seen.add(name)
+                exs.append((name, EXERCISE_MEDIA.get(name), series))
+        days.append((day, tuple(exs)))
+    return ProgramView(tuple(days), split_name)
+
+
+program_view_cache = ProgramCache(
+    maxsize=int(os.environ.get("PROGRAM_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("PROGRAM_CACHE_TTL", 3600)),
+)
+
+
+def cached_program_view(nb_jours, objectifs_muscles, exercices_choisis, level="advanced"):
+    """ProgramView des entrées, mémorisée à côté du programme généré (pas de copie : elle est immuable)"""
+    def compute():
+        programme_by_session, split_name, sessions_order = cached_create_complete_program(
+            nb_jours, objectifs_muscles, exercices_choisis, level)
+        with timings.timer("map"):
+            return build_program_view(programme_by_session, split_name, sessions_order, nb_jours)
+
+    return program_view_cache.get_or_compute(
+        canonical_key(nb_jours, objectifs_muscles, exercices_choisis, level), compute)
@@ -0,0 +1,252 @@
+"""
+Sessions côté serveur : le cookie ne contient plus qu'un identifiant court.
+
+L'état du parcours (niveau, index, objectifs, sélections) est stocké dans un
+SessionStore, sous une forme compacte :
+  - objectifs des muscles : entier, 2 bits par muscle (core.encoding)
+  - sélections d'exercices : masque de bits sur les ids des exercices
+La taille stockée ne dépend donc presque pas du nombre d'exercices choisis.
+
+Deux stores :
+  - MemorySessionStore : LRU en mémoire avec expiration (par worker gunicorn)
+  - SqliteSessionStore : fichier SQLite partagé entre les workers
+
+Les listes d'exercices relues depuis le store sont dans l'ordre de la base :
+l'ordre de sélection n'a pas d'effet sur le programme généré (cf. program_cache).
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from .encoding import EncodingError, code_to_goals, goals_to_code, mask_to_selection, selection_to_mask
+
+_LEVELS = ("beginner", "advanced")
+
+
+# ---------- Encodage compact ----------
+
+# Clé de session -> (clé courte, encodeur, décodeur)
+_CODECS = {
+    "level": ("l", _LEVELS.index, _LEVELS.__getitem__),
+    "muscle_index": ("mi", int, int),
+    "pattern_index": ("pi", int, int),
+    "muscle_goals": ("g", goals_to_code, code_to_goals),
+    "selected_exercises": ("s", selection_to_mask, mask_to_selection),
+    "selected_per_pattern": (
+        "p",
+        lambda per_pattern: {k: selection_to_mask(v) for k, v in per_pattern.items()},
+        lambda packed: {k: mask_to_selection(v) for k, v in packed.items()},
+    ),
+}
+_DECODERS = {short: (key, decode) for key, (short, _, decode) in _CODECS.items()}
+
+
+def encode_session(data):
+    """dict de session -> bytes (JSON compact) ; les valeurs non encodables sont gardées telles quelles"""
+    packed = {}
+    raw = {}
+    for key, value in data.items():
+        codec = _CODECS.get(key)
+        if codec is not None:
+            try:
+                packed[codec[0]] = codec[1](value)
+                continue
+            except (EncodingError, ValueError, TypeError, AttributeError):
+                pass
+        raw[key] = value
+    if raw:
+        packed["x"] = raw
+    return json.dumps(packed, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_session(blob):
+    packed = json.loads(blob)
+    data = dict(packed.pop("x", {}))
+    for short, value in packed.items():
+        key, decode = _DECODERS[short]
+        data[key] = decode(value)
+    return data
+
+
+# ---------- Stores ----------
+
+class SessionStore:
+    """Interface : blobs de session par identifiant, avec expiration"""
+
+    def load(self, sid):
+        raise NotImplementedError
+
+    def save(self, sid, blob, ttl):
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """LRU borné + TTL, thread-safe"""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # sid -> (expires_at, blob)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return entry[1]
+
+    def save(self, sid, blob, ttl):
+        with self._lock:
+            self._entries[sid] = (time.time() + ttl, blob)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteSessionStore(SessionStore):
+    """Sessions dans un fichier SQLite (WAL), partagé entre les processus"""
+
+    def __init__(self, path, purge_every=500):
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions "
+                         "(id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid):
+        row = self._connection().execute(
+            "SELECT data FROM sessions WHERE id = ? AND expires > ?", (sid, time.time())).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, blob, ttl):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)", (sid, blob, now + ttl))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def delete(self, sid):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+
+# ---------- Interface Flask ----------
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Comme la session cookie de Flask : `accessed` passe à True à la première lecture"""
+
+    def __init__(self, initial=None, sid=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Cookie = identifiant aléatoire (128 bits), données dans `store`.
+    Vary: Cookie n'est ajouté que si la requête a lu la session, comme avec le
+    cookie signé. Les requêtes dont le chemin commence par un des `skip_prefixes`
+    (images...) ne lisent pas le store.
+    """
+
+    def __init__(self, store, skip_prefixes=()):
+        self.store = store
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    def open_session(self, app, request):
+        if request.path.startswith(self.skip_prefixes):
+            return ServerSideSession()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            blob = self.store.load(sid)
+            if blob is not None:
+                try:
+                    return ServerSideSession(decode_session(blob), sid=sid)
+                except (ValueError, KeyError, IndexError):
+                    pass
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+
+        ttl = app.permanent_session_lifetime.total_seconds()
+        new_sid = session.sid is None
+        if new_sid:
+            session.sid = secrets.token_urlsafe(16)
+        self.store.save(session.sid, encode_session(dict(session)), ttl)
+        if new_sid or session.permanent:
+            response.vary.add("Cookie")
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
@@ -0,0 +1,81 @@
+"""
+Logs structurés (JSON, une ligne par événement) écrits par un thread dédié.
+
+Le thread qui sert la requête ne fait que filtrer (échantillonnage) et poser
+l'enregistrement dans une file (QueueHandler) ; la sérialisation JSON et
+l'écriture sur le flux se font dans le thread du QueueListener.
+
+Les champs passés dans `extra=` se retrouvent tels quels dans l'objet JSON :
+
+    logger.info("request", extra={"method": "GET", "path": "/generate", "status": 200})
+    -> {"ts": "...", "level": "INFO", "logger": "app", "msg": "request", "method": "GET", ...}
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributs standard d'un LogRecord : tout le reste vient de `extra=`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Garde une fraction `rate` des enregistrements sous `always_level` ; les autres passent tous"""
+
+    def __init__(self, rate=1.0, always_level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.always_level = always_level
+
+    def filter(self, record):
+        return record.levelno >= self.always_level or self.rate >= 1.0 or random.random() < self.rate
+
+
+def setup_structured_logging(logger, stream=None, sample_rate=1.0, level=logging.INFO):
+    """
+    Remplace les handlers de `logger` par QueueHandler -> QueueListener -> flux JSON.
+    Renvoie le listener (déjà démarré, arrêté à la sortie du processus).
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener):
+    # Vide la file avant la sortie ; sans effet si le listener a déjà été arrêté
+    if listener._thread is not None:
+        listener.stop()
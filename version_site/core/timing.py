@@ -0,0 +1,174 @@
+"""
+Mesure du temps passé par étape (génération, rendu des templates, PDF...).
+
+    with timings.timer("generate"):
+        ...
+
+    @timings.timed("map")
+    def f(...): ...
+
+Chaque mesure alimente :
+  - un histogramme en mémoire par étape (par worker), exposé au format texte
+    Prometheus par prometheus_text()
+  - la liste des étapes de la requête en cours (par thread), que l'application
+    renvoie dans l'en-tête Server-Timing
+
+Désactivé (TIMING_ENABLED=0), timer() renvoie un context manager partagé qui
+ne fait rien et timed() appelle directement la fonction.
+"""
+
+import os
+import threading
+import time
+from functools import wraps
+
+# Bornes des buckets (secondes), de 0,5 ms à 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogramme cumulatif à buckets fixes, thread-safe"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # dernier = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        idx = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            idx += 1
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        """(bornes, comptes cumulés, somme, nombre)"""
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return self.buckets + (float("inf"),), cumulative, total, count
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class TimingRegistry:
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ----- Mesure -----
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(self.buckets))
+        histogram.observe(seconds)
+        entries = getattr(self._local, "entries", None)
+        if entries is not None:
+            entries.append((name, seconds))
+
+    # ----- Étapes de la requête en cours (Server-Timing) -----
+
+    def start_request(self):
+        self._local.entries = [] if self.enabled else None
+
+    def finish_request(self):
+        """Étapes mesurées depuis start_request dans ce thread : [(nom, secondes)]"""
+        entries = getattr(self._local, "entries", None)
+        self._local.entries = None
+        return entries or []
+
+    @staticmethod
+    def server_timing_header(entries):
+        """Valeur d'en-tête Server-Timing (durées en ms, étapes répétées additionnées)"""
+        totals = {}
+        for name, seconds in entries:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+    # ----- Export -----
+
+    def prometheus_text(self, metric="mytrainingpal_stage_seconds"):
+        """Histogrammes au format d'exposition texte de Prometheus"""
+        lines = [
+            f"# HELP {metric} Time spent per processing stage.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for name, histogram in histograms:
+            bounds, cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(bounds, cumulative):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {value}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {total!r}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+timings = TimingRegistry(enabled=os.environ.get("TIMING_ENABLED", "1") != "0")
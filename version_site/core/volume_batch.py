@@ -0,0 +1,77 @@
+"""
+Plan de volume par séance d'un lot de clients.
+
+Même résultat que compute_muscle_targets + distribute_muscle_volume_over_sessions,
+client par client ({séance: {muscle: {"poly", "iso"}}}, muscles dans l'ordre des
+objectifs). La répartition d'un muscle ne dépend que de (jours, niveau, objectif,
+muscle) : elle est calculée une fois (table de compute_muscle_targets, règle
+base / extra) et mémorisée, puis chaque client n'est qu'une suite de lectures.
+
+Le plan est une sortie en plus (create_complete_program_many(with_session_targets=True),
+python -m core.batch --session-targets) : le générateur à compteur strict ne le lit pas.
+"""
+
+from functools import lru_cache
+
+from .encoding import GOAL_CODES, GOAL_MUSCLES, SHARE_LEVELS
+from .prog import compute_muscle_targets, create_prog
+
+_MUSCLE_INDEX = {muscle: m for m, muscle in enumerate(GOAL_MUSCLES)}
+_LEVEL_INDEX = {level: i for i, level in enumerate(SHARE_LEVELS)}
+
+# (niveau, code d'objectif) -> (total, poly, iso) ; code 0 : pas d'objectif
+_TARGET_TABLE = tuple(
+    ((0, 0, 0),) + tuple(
+        tuple(compute_muscle_targets({"_": goal}, level)["_"][k] for k in ("total", "poly", "iso"))
+        for goal in sorted(GOAL_CODES, key=GOAL_CODES.__getitem__)
+    )
+    for level in SHARE_LEVELS
+)
+
+
+@lru_cache(maxsize=None)
+def _split_sessions(nb_jours):
+    """(noms des séances, séances de chaque muscle de GOAL_MUSCLES dans l'ordre)"""
+    split = create_prog(nb_jours)
+    sessions_names = tuple(split.sessions.keys())[:nb_jours]
+    sessions_of = tuple(
+        tuple(s for s, name in enumerate(sessions_names) if muscle in split.sessions[name])
+        for muscle in GOAL_MUSCLES
+    )
+    return sessions_names, sessions_of
+
+
+def _spread(total, n):
+    """total séries sur n séances : base + 1 pour les `extra` premières"""
+    base, extra = divmod(total, n)
+    return tuple(base + (r < extra) for r in range(n))
+
+
+@lru_cache(maxsize=None)
+def _muscle_plan(nb_jours, level_idx, code, m):
+    """((séance, poly, iso), ...) d'un muscle, séances sans série omises"""
+    sessions = _split_sessions(nb_jours)[1][m]
+    if not sessions:
+        return ()
+    _, poly, iso = _TARGET_TABLE[level_idx][code]
+    return tuple(
+        (s, p, i) for s, p, i in zip(sessions, _spread(poly, len(sessions)), _spread(iso, len(sessions)))
+        if p or i
+    )
+
+
+def session_targets_many(nb_jours, goal_maps, levels):
+    """
+    Plan par séance de chaque client d'un lot de même nombre de jours (liste de dicts).
+    KeyError pour un muscle hors GOAL_MUSCLES.
+    """
+    sessions_names = _split_sessions(nb_jours)[0]
+    plans = []
+    for goals, level in zip(goal_maps, levels):
+        session_targets = [{} for _ in sessions_names]
+        lvl = _LEVEL_INDEX[level]
+        for muscle, goal in goals.items():
+            for s, poly, iso in _muscle_plan(nb_jours, lvl, GOAL_CODES[goal], _MUSCLE_INDEX[muscle]):
+                session_targets[s][muscle] = {"poly": poly, "iso": iso}
+        plans.append(dict(zip(sessions_names, session_targets)))
+    return plans